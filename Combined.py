@@ -1,6 +1,3 @@
-import tkinter as tk
-from tkinter import StringVar, OptionMenu
-import pyautogui
 import cv2
 import mediapipe as mp
 import time
@@ -8,6 +5,9 @@ import threading
 import json
 import os
 
+from frame_grabber import LatestFrameGrabber
+from key_backends import create_backend
+
 SETTINGS_FILE = "settings.json"
 
 KEY_TRANSLATION_MAP = {
@@ -77,6 +77,10 @@ def save_gesture_mappings(mappings):
 
 def launch_ui(current_mappings):
     """Launch the UI for mapping gestures to keys or hotkeys and return the mappings."""
+    # Tk is only needed once 't' is pressed, keep it off the path to the first frame
+    import tkinter as tk
+    from tkinter import StringVar, OptionMenu
+
     root = tk.Tk()
     root.title("Gesture-to-Key Mapping")
 
@@ -233,7 +237,8 @@ hands = mp_hands.Hands(
     min_tracking_confidence=0.5
 )
 
-cap = cv2.VideoCapture(0)
+cap = LatestFrameGrabber(0)
+key_backend = create_backend()
 
 gesture_start_time = None
 gesture_text = "No Gesture Detected"
@@ -282,9 +287,9 @@ while cap.isOpened():
                     if fingers_up in gesture_mappings:
                         mapping = gesture_mappings[fingers_up]
                         if mapping['type'] == 'single':
-                            pyautogui.press(mapping['keys'][0])
+                            key_backend.press(mapping['keys'][0])
                         elif mapping['type'] == 'hotkey':
-                            pyautogui.hotkey(*mapping['keys'])
+                            key_backend.hotkey(mapping['keys'])
 
             if gesture_start_time and current_time - gesture_start_time >= 2:
                 gesture_text = ""
@@ -304,5 +309,7 @@ while cap.isOpened():
         threading.Thread(target=update_gesture_mappings, daemon=True).start()
 
 cap.release()
+key_backend.close()
+print(cap.summary())
 cv2.destroyAllWindows()
 hands.close()
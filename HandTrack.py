@@ -1,7 +1,8 @@
 import cv2
 import mediapipe as mp
 import time
-import pyautogui
+from frame_grabber import LatestFrameGrabber
+from key_backends import create_backend
 
 # Initialize MediaPipe Hands
 mp_hands = mp.solutions.hands
@@ -16,7 +17,8 @@ hands = mp_hands.Hands(
 )
 
 # Open the webcam
-cap = cv2.VideoCapture(0)
+cap = LatestFrameGrabber(0)
+key_backend = create_backend()
 
 def count_fingers(hand_landmarks):
     """Counts the number of fingers that are up based on hand landmarks."""
@@ -103,7 +105,7 @@ while cap.isOpened():
                         print("Pressing hotkey")
                         #pyautogui.press('winleft')  # Simulates pressing the Windows key\
                         # linkedin hotkey : Ctrl + Shift + Alt + Windows + L
-                        pyautogui.hotkey('ctrl', 'shift', 'alt', 'winleft', 'l')
+                        key_backend.hotkey(['ctrl', 'shift', 'alt', 'winleft', 'l'])
 
                     gesture_recognized = True
                     cooldown_active = True
@@ -132,5 +134,7 @@ while cap.isOpened():
 
 # Release resources
 cap.release()
+key_backend.close()
+print(cap.summary())
 cv2.destroyAllWindows()
 hands.close()
@@ -1,17 +1,43 @@
 import tkinter as tk
 from tkinter import StringVar, OptionMenu, messagebox
-import pyautogui
-import cv2
-import mediapipe as mp
 import time
 import threading
 import json
 import os
-import math
 import copy
 import sys
+import argparse
+import logging
+import queue
+
+import numpy as np
+
+from governor import InferenceGovernor
+from landmarks import HandFeatures, hands_from_results
+from hand_identity import HandIdentityTracker, HANDS
+from landmark_recorder import LandmarkRecorder
+from landmark_predictor import LandmarkPredictor, MAX_STRIDE
+from commands import CommandReader
+from session import CaptureSession
+from finger_patterns import compile_pattern_table, parse_pattern
+from action_dispatcher import POLICIES
+from key_backends import BACKENDS
+from gesture_templates import compile_templates, MATCH_THRESHOLD
+from action_table import (compile_action_table, compile_cooldowns, gesture_label, custom_id, pattern_id, motion_id,
+                          combo_id, combo_key, sequence_key, parse_gesture_id, check_gesture_name, FINGER_IDS,
+                          COMBO_PREFIX, MOTION_PREFIX, SEQUENCE_PREFIX)
+from gesture_state import GestureStates, VOTE_WINDOW, DEFAULT_COOLDOWN
+from gesture_sequences import SequenceMatcher, compile_sequences, DEFAULT_STEP_TIMEOUT
+from motion_gestures import (MotionTracker, compile_motion_templates, is_motion_gesture, trajectory_from_hands,
+                             MOTION_SECONDS)
+
+logger = logging.getLogger("gesture.main")
 
 SETTINGS_FILE = "settings.json"
+# "max" matches the stored templates exactly, "bone" is the cheaper wrist to middle-MCP scale
+NORMALIZE_SCALE = "max"
+# The preview refreshes slower than inference runs, it is only there to look at
+PREVIEW_FPS = 15.0
 
 KEY_TRANSLATION_MAP = {
     'Win_L': 'winleft',
@@ -70,59 +96,115 @@ def load_gesture_mappings():
             data = json.load(f)
         gesture_mappings = {int(k): v for k, v in data.get("gesture_mappings", default_gesture_mappings).items()}
         custom_gestures = data.get("custom_gestures", {})
-        return gesture_mappings, custom_gestures
+        finger_patterns = data.get("finger_patterns", {})
+        combos = data.get("combos", {})
+        sequences = data.get("sequences", {})
+        return gesture_mappings, custom_gestures, finger_patterns, combos, sequences
     else:
-        return copy.deepcopy(default_gesture_mappings), {}
+        return copy.deepcopy(default_gesture_mappings), {}, {}, {}, {}
 
-def save_gesture_mappings(mappings, custom_gestures):
+def save_gesture_mappings(mappings, custom_gestures, finger_patterns, combos, sequences):
     data = {
         "gesture_mappings": {str(k): v for k, v in mappings.items()},
-        "custom_gestures": custom_gestures
+        "custom_gestures": custom_gestures,
+        "finger_patterns": finger_patterns,
+        "combos": combos,
+        "sequences": sequences
     }
     with open(SETTINGS_FILE, 'w') as f:
         json.dump(data, f)
 
 gesture_mappings_lock = threading.Lock()
-gesture_mappings, custom_gestures = load_gesture_mappings()
-
-def normalize_landmarks(landmarks):
-    coords = [(lm.x, lm.y, lm.z) for lm in landmarks.landmark]
-    wrist = coords[0]
-    coords = [(x - wrist[0], y - wrist[1], z - wrist[2]) for (x,y,z) in coords]
-
-    max_dist = max(math.sqrt((x2 - x1)**2 + (y2 - y1)**2 + (z2 - z1)**2)
-                    for i,(x1,y1,z1) in enumerate(coords)
-                    for j,(x2,y2,z2) in enumerate(coords) if i!=j)
-    if max_dist > 0:
-        coords = [(x/max_dist, y/max_dist, z/max_dist) for (x,y,z) in coords]
-    return coords
-
-def recognize_custom_gesture(landmarks):
-    global custom_gestures
-    if not custom_gestures:
+gesture_mappings, custom_gestures, finger_patterns, combos, sequences = load_gesture_mappings()
+# Rebuilt and swapped in whole whenever custom_gestures or finger_patterns change
+compiled_templates = compile_templates(custom_gestures, NORMALIZE_SCALE)
+compiled_motions = compile_motion_templates(custom_gestures)
+compiled_sequences = compile_sequences(sequences)
+pattern_table = compile_pattern_table(finger_patterns)
+
+# Where compiled actions go: run() points it at the session's dispatcher or pipeline
+action_sink = None
+
+def submit_action(mapping):
+    return action_sink(mapping)
+
+action_table = compile_action_table(gesture_mappings, custom_gestures, finger_patterns, submit_action, combos,
+                                    sequences)
+cooldown_table = compile_cooldowns(gesture_mappings, custom_gestures, finger_patterns, combos, sequences)
+# Gestures that fire without going through GestureStates' votes
+UNVOTED_PREFIXES = (COMBO_PREFIX, SEQUENCE_PREFIX, MOTION_PREFIX)
+
+def install_settings(mappings, custom, patterns, combos_local, sequences_local):
+    """Compile everything the recognition loop reads from one set of settings and swap it in.
+
+    The tables above are compiled at import with the defaults; run() calls
+    this before the first capture so the NORMALIZE_SCALE given on the
+    command line applies, and again whenever the settings change.
+    """
+    global gesture_mappings, custom_gestures, finger_patterns, combos, sequences
+    global compiled_templates, compiled_motions, compiled_sequences, pattern_table, action_table, cooldown_table
+    templates = compile_templates(custom, NORMALIZE_SCALE)
+    motions = compile_motion_templates(custom)
+    sequence_trie = compile_sequences(sequences_local)
+    patterns_compiled = compile_pattern_table(patterns)
+    actions = compile_action_table(mappings, custom, patterns, submit_action, combos_local, sequences_local)
+    cooldowns = compile_cooldowns(mappings, custom, patterns, combos_local, sequences_local)
+    with gesture_mappings_lock:
+        gesture_mappings = mappings
+        custom_gestures = custom
+        finger_patterns = patterns
+        combos = combos_local
+        sequences = sequences_local
+        compiled_templates = templates
+        compiled_motions = motions
+        compiled_sequences = sequence_trie
+        pattern_table = patterns_compiled
+        action_table = actions
+        cooldown_table = cooldowns
+
+def install_actions(supports):
+    """Recompile the action table without the mappings whose keys the key backend cannot send.
+
+    Checking a key may import the backend's module, so this runs when
+    capture starts, after the session has loaded it, not before the UI.
+    """
+    global action_table
+    actions = compile_action_table(gesture_mappings, custom_gestures, finger_patterns, submit_action, combos,
+                                   sequences, supports)
+    with gesture_mappings_lock:
+        action_table = actions
+
+def recognize_custom_gesture(features):
+    templates = compiled_templates
+    if not len(templates):
         return None
-    normalized = normalize_landmarks(landmarks)
-    best_gesture = None
-    best_dist = float('inf')
-    for g_name, g_data in custom_gestures.items():
-        ref = g_data['landmarks']
-        dist_sum = 0
-        for (x1,y1,z1),(x2,y2,z2) in zip(normalized, ref):
-            dist_sum += math.sqrt((x1 - x2)**2 + (y1 - y2)**2 + (z1 - z2)**2)
-        avg_dist = dist_sum / len(normalized)
-        if avg_dist < best_dist:
-            best_dist = avg_dist
-            best_gesture = g_name
-    if best_dist < 0.2: # threshold .2 works well
+    best_gesture, best_dist, _ = templates.match(features.normalized)
+    if best_dist < MATCH_THRESHOLD:
         return best_gesture
     return None
 
-def launch_ui(current_mappings, current_custom):
+def recognize_custom_gestures(hand_features):
+    """recognize_custom_gesture for every hand in a frame, with one batched template lookup."""
+    templates = compiled_templates
+    if not len(templates):
+        return [None] * len(hand_features)
+    if len(hand_features) == 1:
+        return [recognize_custom_gesture(hand_features[0])]
+    matches = templates.match_many(np.stack([features.normalized for features in hand_features]))
+    return [name if dist < MATCH_THRESHOLD else None for name, dist, _ in matches]
+
+def recognize_finger_pattern(features):
+    return pattern_table[features.finger_code]
+
+def launch_ui(current_mappings, current_custom, current_patterns, current_combos, current_sequences):
     root = tk.Tk()
     root.title("Gesture-to-Key Mapping")
 
     gesture_mappings_local = copy.deepcopy(current_mappings)
     custom_gestures_local = copy.deepcopy(current_custom)
+    finger_patterns_local = copy.deepcopy(current_patterns)
+    combos_local = copy.deepcopy(current_combos)
+    sequences_local = copy.deepcopy(current_sequences)
 
     mapping_type_vars = {}
     single_key_vars = {}
@@ -134,13 +216,28 @@ def launch_ui(current_mappings, current_custom):
     hotkey_count_vars_custom = {}
     hotkey_vars_custom = {}
 
+    mapping_type_vars_pattern = {}
+    single_key_vars_pattern = {}
+    hotkey_count_vars_pattern = {}
+    hotkey_vars_pattern = {}
+
+    mapping_type_vars_combo = {}
+    single_key_vars_combo = {}
+    hotkey_count_vars_combo = {}
+    hotkey_vars_combo = {}
+
+    mapping_type_vars_sequence = {}
+    single_key_vars_sequence = {}
+    hotkey_count_vars_sequence = {}
+    hotkey_vars_sequence = {}
+
     def handle_keypress(event, var):
         key = event.keysym
         translated_key = KEY_TRANSLATION_MAP.get(key, key.lower())
         var.set(translated_key)
         return "break"
 
-    def update_hotkey_fields(fingers=None, gesture_name=None):
+    def update_hotkey_fields(fingers=None, gesture_name=None, pattern=None, combo=None, sequence=None):
         if fingers is not None:
             parent_type_vars = mapping_type_vars
             parent_hotkey_vars = hotkey_vars
@@ -148,6 +245,27 @@ def launch_ui(current_mappings, current_custom):
             gesture_dict = gesture_mappings_local[fingers]
             base_row = fingers * 3
             identifier = fingers
+        elif pattern is not None:
+            parent_type_vars = mapping_type_vars_pattern
+            parent_hotkey_vars = hotkey_vars_pattern
+            parent_hotkey_count = hotkey_count_vars_pattern
+            gesture_dict = finger_patterns_local[pattern]
+            base_row = pattern_start_row + pattern_names.index(pattern)*3
+            identifier = pattern
+        elif combo is not None:
+            parent_type_vars = mapping_type_vars_combo
+            parent_hotkey_vars = hotkey_vars_combo
+            parent_hotkey_count = hotkey_count_vars_combo
+            gesture_dict = combos_local[combo]
+            base_row = combo_start_row + combo_names.index(combo)*3
+            identifier = combo
+        elif sequence is not None:
+            parent_type_vars = mapping_type_vars_sequence
+            parent_hotkey_vars = hotkey_vars_sequence
+            parent_hotkey_count = hotkey_count_vars_sequence
+            gesture_dict = sequences_local[sequence]
+            base_row = sequence_start_row + sequence_names.index(sequence)*3
+            identifier = sequence
         else:
             parent_type_vars = mapping_type_vars_custom
             parent_hotkey_vars = hotkey_vars_custom
@@ -192,16 +310,40 @@ def launch_ui(current_mappings, current_custom):
                     widget.destroy()
                 hotkey_vars_custom[g_name] = []
 
+        for pattern in pattern_names:
+            if mapping_type_vars_pattern[pattern].get() == 'hotkey':
+                update_hotkey_fields(pattern=pattern)
+            else:
+                for widget in hotkey_vars_pattern[pattern]:
+                    widget.destroy()
+                hotkey_vars_pattern[pattern] = []
+
+        for combo in combo_names:
+            if mapping_type_vars_combo[combo].get() == 'hotkey':
+                update_hotkey_fields(combo=combo)
+            else:
+                for widget in hotkey_vars_combo[combo]:
+                    widget.destroy()
+                hotkey_vars_combo[combo] = []
+
+        for sequence in sequence_names:
+            if mapping_type_vars_sequence[sequence].get() == 'hotkey':
+                update_hotkey_fields(sequence=sequence)
+            else:
+                for widget in hotkey_vars_sequence[sequence]:
+                    widget.destroy()
+                hotkey_vars_sequence[sequence] = []
+
     def save_mappings():
+        # Mappings are updated in place so settings the UI does not show, such as 'cooldown', survive
         for fingers in range(1, 5):
+            mapping = gesture_mappings_local.setdefault(fingers, {})
             if mapping_type_vars[fingers].get() == 'single':
-                gesture_mappings_local[fingers] = {
-                    'type': 'single',
-                    'keys': [single_key_vars[fingers].get()]
-                }
+                mapping['type'] = 'single'
+                mapping['keys'] = [single_key_vars[fingers].get()]
             else:
-                keys = [entry.get() for entry in hotkey_vars[fingers] if entry.get()]
-                gesture_mappings_local[fingers] = {'type': 'hotkey', 'keys': keys}
+                mapping['type'] = 'hotkey'
+                mapping['keys'] = [entry.get() for entry in hotkey_vars[fingers] if entry.get()]
 
         for g_name in custom_gesture_names:
             if mapping_type_vars_custom[g_name].get() == 'single':
@@ -212,7 +354,35 @@ def launch_ui(current_mappings, current_custom):
                 custom_gestures_local[g_name]['type'] = 'hotkey'
                 custom_gestures_local[g_name]['keys'] = keys
 
-        save_gesture_mappings(gesture_mappings_local, custom_gestures_local)
+        for pattern in pattern_names:
+            mapping = finger_patterns_local.setdefault(pattern, {})
+            if mapping_type_vars_pattern[pattern].get() == 'single':
+                mapping['type'] = 'single'
+                mapping['keys'] = [single_key_vars_pattern[pattern].get()]
+            else:
+                mapping['type'] = 'hotkey'
+                mapping['keys'] = [entry.get() for entry in hotkey_vars_pattern[pattern] if entry.get()]
+
+        for combo in combo_names:
+            mapping = combos_local[combo]
+            if mapping_type_vars_combo[combo].get() == 'single':
+                mapping['type'] = 'single'
+                mapping['keys'] = [single_key_vars_combo[combo].get()]
+            else:
+                mapping['type'] = 'hotkey'
+                mapping['keys'] = [entry.get() for entry in hotkey_vars_combo[combo] if entry.get()]
+
+        for sequence in sequence_names:
+            mapping = sequences_local[sequence]
+            if mapping_type_vars_sequence[sequence].get() == 'single':
+                mapping['type'] = 'single'
+                mapping['keys'] = [single_key_vars_sequence[sequence].get()]
+            else:
+                mapping['type'] = 'hotkey'
+                mapping['keys'] = [entry.get() for entry in hotkey_vars_sequence[sequence] if entry.get()]
+
+        save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                              sequences_local)
         root.destroy()
         # After destroying, we go to main capture loop again
 
@@ -225,12 +395,104 @@ def launch_ui(current_mappings, current_custom):
     def delete_gesture(g_name):
         if messagebox.askyesno("Delete Gesture", f"Are you sure you want to delete gesture '{g_name}'?"):
             del custom_gestures_local[g_name]
-            save_gesture_mappings(gesture_mappings_local, custom_gestures_local)
+            save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                                  sequences_local)
             root.destroy()
             # Relaunch UI
             global mode
             mode = "ui_relaunch"
 
+    def add_pattern():
+        pattern = new_pattern_var.get().strip().lower()
+        try:
+            parse_pattern(pattern)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if pattern in finger_patterns_local:
+            messagebox.showerror("Error", "Pattern already exists.")
+            return
+        finger_patterns_local[pattern] = {'type': 'single', 'keys': ['space']}
+        save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                              sequences_local)
+        root.destroy()
+        global mode
+        mode = "ui_relaunch"
+
+    def delete_pattern(pattern):
+        if messagebox.askyesno("Delete Pattern", f"Are you sure you want to delete pattern '{pattern}'?"):
+            del finger_patterns_local[pattern]
+            save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                                  sequences_local)
+            root.destroy()
+            global mode
+            mode = "ui_relaunch"
+
+    def add_combo():
+        try:
+            left, right = (parse_gesture_id(var.get(), custom_gestures_local, finger_patterns_local)
+                           for var in (new_combo_left_var, new_combo_right_var))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if left.startswith(MOTION_PREFIX) or right.startswith(MOTION_PREFIX):
+            messagebox.showerror("Error", "Combos are made of poses, motion gestures cannot be part of one.")
+            return
+        combo = combo_key(left, right)
+        if combo in combos_local:
+            messagebox.showerror("Error", "Combo already exists.")
+            return
+        combos_local[combo] = {'type': 'single', 'keys': ['space']}
+        save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                              sequences_local)
+        root.destroy()
+        global mode
+        mode = "ui_relaunch"
+
+    def delete_combo(combo):
+        if messagebox.askyesno("Delete Combo", f"Are you sure you want to delete '{gesture_label(COMBO_PREFIX + combo)}'?"):
+            del combos_local[combo]
+            save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                                  sequences_local)
+            root.destroy()
+            global mode
+            mode = "ui_relaunch"
+
+    def add_sequence():
+        try:
+            steps = [parse_gesture_id(step, custom_gestures_local, finger_patterns_local)
+                     for step in new_sequence_var.get().split(",") if step.strip()]
+            timeout = float(new_sequence_timeout_var.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if len(steps) < 2:
+            messagebox.showerror("Error", "A sequence needs at least two gestures, separated by commas.")
+            return
+        if timeout <= 0:
+            messagebox.showerror("Error", "The time between gestures must be positive.")
+            return
+        sequence = sequence_key(steps)
+        if sequence in sequences_local:
+            messagebox.showerror("Error", "Sequence already exists.")
+            return
+        sequences_local[sequence] = {'type': 'single', 'keys': ['space'], 'timeout': timeout}
+        save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                              sequences_local)
+        root.destroy()
+        global mode
+        mode = "ui_relaunch"
+
+    def delete_sequence(sequence):
+        if messagebox.askyesno("Delete Sequence",
+                               f"Are you sure you want to delete '{gesture_label(SEQUENCE_PREFIX + sequence)}'?"):
+            del sequences_local[sequence]
+            save_gesture_mappings(gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local,
+                                  sequences_local)
+            root.destroy()
+            global mode
+            mode = "ui_relaunch"
+
     tk.Label(root, text="Gesture Mapping", font=("Arial", 14)).grid(row=0, column=0, columnspan=5, pady=10)
 
     for fingers in range(1, 5):
@@ -263,10 +525,54 @@ def launch_ui(current_mappings, current_custom):
         hotkey_count_vars_custom[g_name] = tk.IntVar(value=len(keys) if mtype == 'hotkey' else 1)
         hotkey_vars_custom[g_name] = []
 
+    pattern_names = sorted(finger_patterns_local.keys())
+    pattern_header_row = custom_start_row + len(custom_gesture_names)*3 - 2
+    pattern_start_row = pattern_header_row + 3
+    for pattern in pattern_names:
+        mtype = finger_patterns_local[pattern]['type']
+        keys = finger_patterns_local[pattern]['keys']
+
+        mapping_type_vars_pattern[pattern] = tk.StringVar(value=mtype)
+        single_key_vars_pattern[pattern] = tk.StringVar(value=keys[0] if keys else 'space')
+        hotkey_count_vars_pattern[pattern] = tk.IntVar(value=len(keys) if mtype == 'hotkey' else 1)
+        hotkey_vars_pattern[pattern] = []
+
+    add_pattern_row = pattern_start_row + len(pattern_names)*3 - 2
+    combo_names = sorted(combos_local.keys())
+    combo_header_row = add_pattern_row + 1
+    combo_start_row = combo_header_row + 3
+    for combo in combo_names:
+        mtype = combos_local[combo]['type']
+        keys = combos_local[combo]['keys']
+
+        mapping_type_vars_combo[combo] = tk.StringVar(value=mtype)
+        single_key_vars_combo[combo] = tk.StringVar(value=keys[0] if keys else 'space')
+        hotkey_count_vars_combo[combo] = tk.IntVar(value=len(keys) if mtype == 'hotkey' else 1)
+        hotkey_vars_combo[combo] = []
+
+    add_combo_row = combo_start_row + len(combo_names)*3 - 2
+    sequence_names = sorted(sequences_local.keys())
+    sequence_header_row = add_combo_row + 1
+    sequence_start_row = sequence_header_row + 3
+    for sequence in sequence_names:
+        mtype = sequences_local[sequence]['type']
+        keys = sequences_local[sequence]['keys']
+
+        mapping_type_vars_sequence[sequence] = tk.StringVar(value=mtype)
+        single_key_vars_sequence[sequence] = tk.StringVar(value=keys[0] if keys else 'space')
+        hotkey_count_vars_sequence[sequence] = tk.IntVar(value=len(keys) if mtype == 'hotkey' else 1)
+        hotkey_vars_sequence[sequence] = []
+
     for fingers in range(1, 5):
         mapping_type_vars[fingers].trace_add("write", on_mapping_type_change)
     for g_name in custom_gesture_names:
         mapping_type_vars_custom[g_name].trace_add("write", on_mapping_type_change)
+    for pattern in pattern_names:
+        mapping_type_vars_pattern[pattern].trace_add("write", on_mapping_type_change)
+    for combo in combo_names:
+        mapping_type_vars_combo[combo].trace_add("write", on_mapping_type_change)
+    for sequence in sequence_names:
+        mapping_type_vars_sequence[sequence].trace_add("write", on_mapping_type_change)
 
     for fingers in range(1, 5):
         tk.Label(root, text=f"{fingers} Finger(s) Up:", font=("Arial", 12)).grid(row=fingers * 3 - 2, column=0, padx=10, pady=5)
@@ -291,7 +597,8 @@ def launch_ui(current_mappings, current_custom):
     offset = 0
     for g_name in custom_gesture_names:
         base_row = custom_start_row + offset*3
-        tk.Label(root, text=f"Custom: {g_name}", font=("Arial", 12)).grid(row=base_row-2, column=0, padx=10, pady=5)
+        kind = "Motion" if is_motion_gesture(custom_gestures_local[g_name]) else "Custom"
+        tk.Label(root, text=f"{kind}: {g_name}", font=("Arial", 12)).grid(row=base_row-2, column=0, padx=10, pady=5)
         tk.OptionMenu(root, mapping_type_vars_custom[g_name], 'single', 'hotkey').grid(row=base_row-2, column=1, padx=10)
 
         single_key_entry = tk.Entry(root, textvariable=single_key_vars_custom[g_name], width=10, font=("Arial", 12))
@@ -314,27 +621,114 @@ def launch_ui(current_mappings, current_custom):
             hotkey_vars_custom[g_name] = []
         offset += 1
 
-    tk.Button(root, text="Add Gesture", command=add_gesture, font=("Arial", 12)).grid(row=custom_start_row+offset*3, column=0, columnspan=1, pady=10)
-    tk.Button(root, text="Save & Start", command=save_mappings, font=("Arial", 12)).grid(row=custom_start_row+offset*3, column=2, columnspan=2, pady=10)
+    tk.Label(root, text="Finger Patterns (thumb to pinky: 1 up, 0 down, x either)",
+             font=("Arial", 12)).grid(row=pattern_header_row, column=0, columnspan=5, pady=5)
+
+    offset = 0
+    for pattern in pattern_names:
+        base_row = pattern_start_row + offset*3
+        tk.Label(root, text=f"Pattern: {pattern}", font=("Arial", 12)).grid(row=base_row-2, column=0, padx=10, pady=5)
+        tk.OptionMenu(root, mapping_type_vars_pattern[pattern], 'single', 'hotkey').grid(row=base_row-2, column=1, padx=10)
+
+        single_key_entry = tk.Entry(root, textvariable=single_key_vars_pattern[pattern], width=10, font=("Arial", 12))
+        single_key_entry.grid(row=base_row-2, column=2, padx=10, pady=5)
+        single_key_entry.bind('<KeyPress>', lambda event, var=single_key_vars_pattern[pattern]: handle_keypress(event, var))
+
+        tk.Label(root, text="Hotkey Count:", font=("Arial", 12)).grid(row=base_row-1, column=0, padx=10, pady=5)
+        count_selector = tk.Spinbox(root, from_=1, to=10, textvariable=hotkey_count_vars_pattern[pattern], width=5,
+                                    command=lambda p=pattern: update_hotkey_fields(pattern=p))
+        count_selector.grid(row=base_row-1, column=1, padx=10, pady=5)
+
+        del_button = tk.Button(root, text="Delete", command=lambda p=pattern: delete_pattern(p), font=("Arial", 12))
+        del_button.grid(row=base_row-1, column=3, padx=10, pady=5)
+
+        if finger_patterns_local[pattern]['type'] == 'hotkey':
+            update_hotkey_fields(pattern=pattern)
+        offset += 1
+
+    new_pattern_var = tk.StringVar(value='')
+    tk.Entry(root, textvariable=new_pattern_var, width=10, font=("Arial", 12)).grid(row=add_pattern_row, column=1, padx=10, pady=5)
+    tk.Button(root, text="Add Pattern", command=add_pattern, font=("Arial", 12)).grid(row=add_pattern_row, column=0, pady=5)
+
+    tk.Label(root, text="Two-Hand Combos (left + right: finger count, pattern or custom gesture)",
+             font=("Arial", 12)).grid(row=combo_header_row, column=0, columnspan=5, pady=5)
+
+    offset = 0
+    for combo in combo_names:
+        base_row = combo_start_row + offset*3
+        tk.Label(root, text=gesture_label(COMBO_PREFIX + combo), font=("Arial", 12)).grid(row=base_row-2, column=0, padx=10, pady=5)
+        tk.OptionMenu(root, mapping_type_vars_combo[combo], 'single', 'hotkey').grid(row=base_row-2, column=1, padx=10)
+
+        single_key_entry = tk.Entry(root, textvariable=single_key_vars_combo[combo], width=10, font=("Arial", 12))
+        single_key_entry.grid(row=base_row-2, column=2, padx=10, pady=5)
+        single_key_entry.bind('<KeyPress>', lambda event, var=single_key_vars_combo[combo]: handle_keypress(event, var))
+
+        tk.Label(root, text="Hotkey Count:", font=("Arial", 12)).grid(row=base_row-1, column=0, padx=10, pady=5)
+        count_selector = tk.Spinbox(root, from_=1, to=10, textvariable=hotkey_count_vars_combo[combo], width=5,
+                                    command=lambda c=combo: update_hotkey_fields(combo=c))
+        count_selector.grid(row=base_row-1, column=1, padx=10, pady=5)
+
+        del_button = tk.Button(root, text="Delete", command=lambda c=combo: delete_combo(c), font=("Arial", 12))
+        del_button.grid(row=base_row-1, column=3, padx=10, pady=5)
+
+        if combos_local[combo]['type'] == 'hotkey':
+            update_hotkey_fields(combo=combo)
+        offset += 1
+
+    new_combo_left_var = tk.StringVar(value='')
+    new_combo_right_var = tk.StringVar(value='')
+    tk.Entry(root, textvariable=new_combo_left_var, width=10, font=("Arial", 12)).grid(row=add_combo_row, column=1, padx=10, pady=5)
+    tk.Entry(root, textvariable=new_combo_right_var, width=10, font=("Arial", 12)).grid(row=add_combo_row, column=2, padx=10, pady=5)
+    tk.Button(root, text="Add Combo", command=add_combo, font=("Arial", 12)).grid(row=add_combo_row, column=0, pady=5)
+
+    tk.Label(root, text="Sequences (gestures in order, comma separated, and the seconds allowed between them)",
+             font=("Arial", 12)).grid(row=sequence_header_row, column=0, columnspan=5, pady=5)
+
+    offset = 0
+    for sequence in sequence_names:
+        base_row = sequence_start_row + offset*3
+        tk.Label(root, text=gesture_label(SEQUENCE_PREFIX + sequence), font=("Arial", 12)).grid(row=base_row-2, column=0, padx=10, pady=5)
+        tk.OptionMenu(root, mapping_type_vars_sequence[sequence], 'single', 'hotkey').grid(row=base_row-2, column=1, padx=10)
+
+        single_key_entry = tk.Entry(root, textvariable=single_key_vars_sequence[sequence], width=10, font=("Arial", 12))
+        single_key_entry.grid(row=base_row-2, column=2, padx=10, pady=5)
+        single_key_entry.bind('<KeyPress>', lambda event, var=single_key_vars_sequence[sequence]: handle_keypress(event, var))
+
+        tk.Label(root, text="Hotkey Count:", font=("Arial", 12)).grid(row=base_row-1, column=0, padx=10, pady=5)
+        count_selector = tk.Spinbox(root, from_=1, to=10, textvariable=hotkey_count_vars_sequence[sequence], width=5,
+                                    command=lambda q=sequence: update_hotkey_fields(sequence=q))
+        count_selector.grid(row=base_row-1, column=1, padx=10, pady=5)
+
+        del_button = tk.Button(root, text="Delete", command=lambda q=sequence: delete_sequence(q), font=("Arial", 12))
+        del_button.grid(row=base_row-1, column=3, padx=10, pady=5)
+
+        if sequences_local[sequence]['type'] == 'hotkey':
+            update_hotkey_fields(sequence=sequence)
+        offset += 1
+
+    add_sequence_row = sequence_start_row + offset*3 - 2
+    new_sequence_var = tk.StringVar(value='')
+    new_sequence_timeout_var = tk.StringVar(value=str(DEFAULT_STEP_TIMEOUT))
+    tk.Entry(root, textvariable=new_sequence_var, width=20, font=("Arial", 12)).grid(row=add_sequence_row, column=1, columnspan=2, padx=10, pady=5)
+    tk.Entry(root, textvariable=new_sequence_timeout_var, width=5, font=("Arial", 12)).grid(row=add_sequence_row, column=3, padx=10, pady=5)
+    tk.Button(root, text="Add Sequence", command=add_sequence, font=("Arial", 12)).grid(row=add_sequence_row, column=0, pady=5)
+
+    tk.Button(root, text="Add Gesture", command=add_gesture, font=("Arial", 12)).grid(row=add_sequence_row+1, column=0, columnspan=1, pady=10)
+    tk.Button(root, text="Save & Start", command=save_mappings, font=("Arial", 12)).grid(row=add_sequence_row+1, column=2, columnspan=2, pady=10)
 
     root.mainloop()
-    return gesture_mappings_local, custom_gestures_local
+    return gesture_mappings_local, custom_gestures_local, finger_patterns_local, combos_local, sequences_local
+
+def start_gesture_capture(session):
+    import cv2
+    from overlay import draw_hand
 
-def start_gesture_capture():
     # Gesture capture mode
     # simple vlocking approach to capture a new gesture as it seems to be a blocking operation
     # open a new window with a text entry for gesture name
     # use OpenCV in another window in a loop - for video
     #  break when capture button is pressed or window closed
 
-    cap = cv2.VideoCapture(0)
-    hands = mp.solutions.hands.Hands(
-        static_image_mode=False,
-        max_num_hands=1,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
-
     captured_landmarks = [None]
     done = [False]
 
@@ -343,27 +737,75 @@ def start_gesture_capture():
         if window.winfo_exists():
             window.destroy()
 
-    def capture_gesture_action():
-        if captured_landmarks[0] is not None:
-            g_name = name_var.get().strip()
-            if not g_name:
-                messagebox.showerror("Error", "Please enter a gesture name.")
+    # (time, hand) seen since Record Motion was pressed and when the first was, None when not recording
+    motion_frames = [None]
+    motion_started = [None]
+
+    def store_template(g_name, field, extra_field, template):
+        kind = "motion" if field == 'trajectory' else "pose"
+        if g_name in custom_gestures:
+            if is_motion_gesture(custom_gestures[g_name]) != (kind == "motion"):
+                messagebox.showerror("Error", f"Gesture '{g_name}' exists and is not a {kind}.")
                 return
-            if g_name in custom_gestures:
-                messagebox.showerror("Error", "Gesture name already exists.")
+            if not messagebox.askyesno("Gesture Exists",
+                                       f"Gesture '{g_name}' already exists. Add this {kind} as another template for it?"):
                 return
+            custom_gestures[g_name].setdefault(extra_field, []).append(template)
+        else:
             custom_gestures[g_name] = {
                 'type': 'single',
                 'keys': ['space'],
-                'landmarks': normalize_landmarks(captured_landmarks[0])
+                field: template
             }
-            save_gesture_mappings(gesture_mappings, custom_gestures)
-            done[0] = True
-            if window.winfo_exists():
-                window.destroy()
+        save_gesture_mappings(gesture_mappings, custom_gestures, finger_patterns, combos, sequences)
+        install_settings(gesture_mappings, custom_gestures, finger_patterns, combos, sequences)
+        done[0] = True
+        if window.winfo_exists():
+            window.destroy()
+
+    def gesture_name():
+        g_name = name_var.get().strip()
+        if not g_name:
+            messagebox.showerror("Error", "Please enter a gesture name.")
+            return g_name
+        try:
+            check_gesture_name(g_name)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return ""
+        return g_name
+
+    def capture_gesture_action():
+        if captured_landmarks[0] is not None:
+            g_name = gesture_name()
+            if not g_name:
+                return
+            # Templates are always stored max-normalized whatever NORMALIZE_SCALE is
+            store_template(g_name, 'landmarks', 'extra_templates', captured_landmarks[0].normalized.tolist())
         else:
             messagebox.showerror("Error", "No hand detected. Please ensure a hand is visible.")
 
+    def record_motion_action():
+        if gesture_name():
+            motion_frames[0] = []
+            motion_started[0] = None
+            record_button.config(text="Recording...", state=tk.DISABLED)
+
+    def finish_motion():
+        frames = motion_frames[0]
+        motion_frames[0] = None
+        record_button.config(text="Record Motion", state=tk.NORMAL)
+        if len(frames) < 2:
+            messagebox.showerror("Error", "No hand detected. Please ensure a hand is visible.")
+            return
+        g_name = gesture_name()
+        if not g_name:
+            return
+        times, raws = zip(*frames)
+        # Resampled by time, like the live window, so an uneven frame rate does not distort the movement
+        trajectory = trajectory_from_hands(raws, times)
+        store_template(g_name, 'trajectory', 'extra_trajectories', trajectory.tolist())
+
     window = tk.Tk()
     window.title("Add New Gesture")
 
@@ -373,28 +815,32 @@ def start_gesture_capture():
 
     capture_button = tk.Button(window, text="Capture", command=capture_gesture_action)
     capture_button.pack(pady=10)
+    # Records the hand for as long as the live motion window and stores the movement
+    record_button = tk.Button(window, text="Record Motion", command=record_motion_action)
+    record_button.pack(pady=10)
 
     window.protocol("WM_DELETE_WINDOW", on_closing)
 
     def loop_capture():
         if done[0]:
             return
-        ret, frame = cap.read()
+        ret, frame, hand_features = session.read_hands()
         if ret:
-            frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb_frame)
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    mp.solutions.drawing_utils.draw_landmarks(
-                        frame,
-                        hand_landmarks,
-                        mp.solutions.hands.HAND_CONNECTIONS,
-                        mp.solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
-                        mp.solutions.drawing_utils.DrawingSpec(color=(0, 0, 255), thickness=2)
-                    )
-                    captured_landmarks[0] = hand_landmarks
-                    break
+            for features in hand_features:
+                draw_hand(frame, features)
+                captured_landmarks[0] = features
+                if motion_frames[0] is not None:
+                    # Timed from the first frame with a hand, so the motion can start after the click
+                    now = time.time()
+                    if motion_started[0] is None:
+                        motion_started[0] = now
+                    motion_frames[0].append((now, features.raw.copy()))
+                break
+            started = motion_started[0]
+            if motion_frames[0] is not None and started is not None and time.time() - started >= MOTION_SECONDS:
+                finish_motion()
+                if done[0]:
+                    return
             cv2.imshow("Capture Gesture", frame)
             if cv2.waitKey(10) & 0xFF == ord('q'):
                 on_closing()
@@ -404,185 +850,369 @@ def start_gesture_capture():
     loop_capture()
     window.mainloop()
 
-    cap.release()
     cv2.destroyAllWindows()
-    hands.close()
-
-def count_fingers(hand_landmarks):
-    finger_tips = [
-        mp.solutions.hands.HandLandmark.INDEX_FINGER_TIP,
-        mp.solutions.hands.HandLandmark.MIDDLE_FINGER_TIP,
-        mp.solutions.hands.HandLandmark.RING_FINGER_TIP,
-        mp.solutions.hands.HandLandmark.PINKY_TIP
-    ]
-    finger_pips = [
-        mp.solutions.hands.HandLandmark.INDEX_FINGER_PIP,
-        mp.solutions.hands.HandLandmark.MIDDLE_FINGER_PIP,
-        mp.solutions.hands.HandLandmark.RING_FINGER_PIP,
-        mp.solutions.hands.HandLandmark.PINKY_PIP
-    ]
-
-    fingers_up = 0
-    """thumb_tip = hand_landmarks.landmark[mp.solutions.hands.HandLandmark.THUMB_TIP]
-    thumb_ip = hand_landmarks.landmark[mp.solutions.hands.HandLandmark.THUMB_IP]
-    thumb_mcp = hand_landmarks.landmark[mp.solutions.hands.HandLandmark.THUMB_MCP]
-    wrist = hand_landmarks.landmark[mp.solutions.hands.HandLandmark.WRIST]
-
-    # Check thumb
-    if thumb_tip.x < thumb_ip.x if wrist.x < thumb_mcp.x else thumb_tip.x > thumb_ip.x:
-        fingers_up += 1"""
-    # we will ignore thumb for now, its not worth the glitchy behavior 
-    # #maybe we can come back to it another time but I think 4 predefined gestures is more than enough
-
-
-    # Check other fingers 
-    for tip, pip in zip(finger_tips, finger_pips):
-        if hand_landmarks.landmark[tip].y < hand_landmarks.landmark[pip].y:
-            fingers_up += 1
-
-    return fingers_up
-
-def main_capture_loop():
-    global gesture_mappings, custom_gestures
-
-    mp_hands = mp.solutions.hands
-    mp_drawing = mp.solutions.drawing_utils
-
-    hands = mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=1,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
-
-    cap = cv2.VideoCapture(0)
+
+def count_fingers(features):
+    # The thumb is left out of the count so the 1-4 mappings stay stable,
+    # finger patterns can use it through its own bit in finger_code
+    return features.fingers_up
+
+def main_capture_loop(session, budget_ms=None, headless=False, preview_fps=PREVIEW_FPS, commands=None,
+                      recorder=None, vote_window=VOTE_WINDOW, cooldown=DEFAULT_COOLDOWN, predict=None):
+    # OpenCV is imported here rather than at the top so the mapping UI can appear without it
+    import cv2
+    from overlay import OverlayRenderer
+
+    use_pipeline = session.use_pipeline
+    clock = session.clock
+    metrics = session.metrics
+    if use_pipeline:
+        pipe = session.pipeline
+    else:
+        cap = session.cap
+        hands = session.hands
+        roi_tracker = session.roi_tracker
+        governor = InferenceGovernor(budget_ms, metrics=metrics)
+        # Extrapolates the landmarks on frames without inference, which then only runs every few frames
+        predictor = LandmarkPredictor(predict, scale_method=NORMALIZE_SCALE) if predict else None
+        hand_features = []
     gesture_start_time = None
     gesture_text = "No Gesture Detected"
     Instruction = "Press 'q' to quit, 't' to go back to UI"
-    last_fingers_up = -1
-
-    COOLDOWN_TIME = 2.0
-    last_recognition_time = 0.0
-
-    while cap.isOpened():
+    # A gesture fires once it wins a majority of the last vote_window frames
+    gesture_states = GestureStates(vote_window, default_cooldown=cooldown, cooldowns=cooldown_table, metrics=metrics)
+    # Motions are matched on each hand's recent trajectory and fire as soon as they complete
+    motion_trackers = {}
+    # When each (hand, combo, sequence or motion) last fired, for the same cooldowns as poses
+    unvoted_fired = {}
+    # Keeps 'Left' and 'Right' on the same physical hands when MediaPipe's handedness flickers
+    hand_identity = HandIdentityTracker()
+    held_pair = (None, None)
+    # Follows each hand through the configured gesture sequences
+    sequence_matcher = SequenceMatcher(compiled_sequences)
+    # Headless runs take their commands from stdin or signals and never touch HighGUI
+    renderer = None if headless else OverlayRenderer(fps=preview_fps)
+    if commands:
+        commands.listen()
+        print("Recognizing gestures, enter q to quit or t to go back to the UI")
+
+    while use_pipeline or cap.isOpened():
         global mode
         if mode != "capture":
             break
 
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
-
-        detected_gesture = None
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                mp_drawing.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
-                    mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
-                )
-
-                fingers_up = count_fingers(hand_landmarks)
-                # Try to recognize custom gestures
-                custom_g = recognize_custom_gesture(hand_landmarks)
-                if custom_g:
-                    detected_gesture = custom_g
-                else:
-                    detected_gesture = fingers_up
-
-                current_time = time.time()
-
-                if detected_gesture != last_fingers_up and (current_time - last_recognition_time) >= COOLDOWN_TIME:
-                    last_fingers_up = detected_gesture
-                    gesture_start_time = current_time
-                    if isinstance(detected_gesture, int):
-                        gesture_text = f"{detected_gesture} Finger(s) Up"
-                    else:
-                        gesture_text = f"Custom: {detected_gesture}"
-                    last_recognition_time = current_time
-
-                    with gesture_mappings_lock:
-                        if isinstance(detected_gesture, int) and detected_gesture in gesture_mappings:
-                            mapping = gesture_mappings[detected_gesture]
-                            if mapping['type'] == 'single':
-                                pyautogui.press(mapping['keys'][0])
-                            elif mapping['type'] == 'hotkey':
-                                pyautogui.hotkey(*mapping['keys'])
-                        elif isinstance(detected_gesture, str) and detected_gesture in custom_gestures:
-                            mapping = custom_gestures[detected_gesture]
-                            if mapping['type'] == 'single':
-                                pyautogui.press(mapping['keys'][0])
-                            elif mapping['type'] == 'hotkey':
-                                pyautogui.hotkey(*mapping['keys'])
-
-                if gesture_start_time and current_time - gesture_start_time >= 2:
-                    gesture_text = ""
-
+        if use_pipeline:
+            try:
+                ret, slot, frame, landmarks = pipe.read()
+            except queue.Empty:
+                # The camera stalled but the workers are alive; keep answering commands meanwhile
+                command = commands.poll() if commands else None
+                if command == "quit":
+                    mode = "exit"
+                    break
+                if command == "ui":
+                    mode = "ui_relaunch"
+                    break
+                continue
+            if not ret:
+                # Camera gone or a worker died
+                mode = "exit"
                 break
+            session.frame_arrived()
+            # No governor here, the frame is timed from the moment its result is read
+            frame_started = time.perf_counter()
+            hand_features = (HandFeatures.batch(landmarks, NORMALIZE_SCALE, pipe.handedness)
+                             if landmarks is not None else [])
         else:
+            ret, frame = cap.read()
+            if not ret:
+                if not cap.isOpened():
+                    # Camera gone or recording played out
+                    mode = "exit"
+                break
+            session.frame_arrived()
+            governor.begin_frame()
+            inferred = False
+
+            if cap.needs_inference:
+                frame = cv2.flip(frame, 1)
+            if not cap.needs_inference:
+                if predictor and not predictor.should_infer():
+                    # Recorded landmarks are only used on the frames that would have been inferred
+                    hand_features = predictor.predict(clock.time())
+                    metrics.count("frames_predicted")
+                    governor.mark("predict")
+                else:
+                    # Replayed landmarks stand in for inference
+                    hand_features = ([HandFeatures(cap.landmarks, NORMALIZE_SCALE, cap.handedness)]
+                                     if cap.landmarks is not None else [])
+                    inferred = True
+                    governor.mark("inference")
+            # On skipped frames the previous landmarks stay in use, or are predicted
+            elif governor.should_infer() and (predictor is None or predictor.should_infer()):
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                if governor.scale < 1.0:
+                    rgb_frame = cv2.resize(rgb_frame, None, fx=governor.scale, fy=governor.scale,
+                                           interpolation=cv2.INTER_AREA)
+                governor.mark("preprocess")
+                if roi_tracker:
+                    multi_hand_landmarks = roi_tracker.process(rgb_frame)
+                    multi_handedness = roi_tracker.multi_handedness
+                else:
+                    results = hands.process(rgb_frame)
+                    multi_hand_landmarks, multi_handedness = results.multi_hand_landmarks, results.multi_handedness
+                # Landmarks are converted once here, all hands in one batch, and shared by every classifier
+                # and the overlay
+                hand_features = hands_from_results(multi_hand_landmarks, multi_handedness, NORMALIZE_SCALE)
+                inferred = True
+                governor.mark("inference")
+            elif predictor:
+                governor.mark("preprocess")
+                hand_features = predictor.predict(clock.time())
+                metrics.count("frames_predicted")
+                governor.mark("predict")
+            else:
+                governor.mark("preprocess")
+
+        observations = []
+        motions = []
+        metrics.count("frames")
+
+        hand_features = hand_identity.assign(hand_features)
+        if not use_pipeline and predictor and inferred:
+            predictor.correct(hand_features, clock.time())
+        if hand_features:
+            metrics.count("detections")
+            # Custom gestures of both hands are looked up in one batch
+            custom_names = recognize_custom_gestures(hand_features)
+            for features, custom_g in zip(hand_features, custom_names):
+                fingers_up = count_fingers(features)
+                pattern = recognize_finger_pattern(features)
+                if custom_g:
+                    detected_gesture = custom_id(custom_g)
+                elif pattern:
+                    detected_gesture = pattern_id(pattern)
+                else:
+                    detected_gesture = FINGER_IDS[fingers_up]
+                observations.append((features.handedness, detected_gesture))
+
+                tracker = motion_trackers.get(features.handedness)
+                if tracker is None:
+                    tracker = motion_trackers[features.handedness] = MotionTracker()
+                motion = tracker.update(features.raw, compiled_motions, clock.time())
+                if motion:
+                    motions.append((features.handedness, motion_id(motion)))
+        # A hand that leaves the frame breaks its motion
+        seen_hands = {hand for hand, _ in observations}
+        for hand, tracker in motion_trackers.items():
+            if hand not in seen_hands:
+                tracker.reset()
+
+        current_time = clock.time()
+        fired = gesture_states.update(observations, current_time)
+        pair = tuple(gesture_states.stable(hand) for hand in HANDS)
+        if pair != held_pair:
+            held_pair = pair
+            if None not in pair:
+                combo = combo_id(*pair)
+                if combo in action_table:
+                    # A mapped combo takes the place of what either hand triggers on its own this frame
+                    fired = [(None, combo)]
+        sequences_now = compiled_sequences
+        if len(sequences_now):
+            if sequence_matcher.trie is not sequences_now:
+                sequence_matcher = SequenceMatcher(sequences_now)
+            # Steps are changes of a hand's held gesture, and its motions
+            steps = [(hand, sequence_matcher.update(hand, held, current_time)) for hand, held in zip(HANDS, pair)]
+            steps += [(hand, sequence_matcher.advance(hand, motion, current_time)) for hand, motion in motions]
+            for hand, sequence in steps:
+                if sequence in action_table:
+                    # A completed sequence takes the place of what its hand triggers on its own this frame
+                    fired = [(h, g) for h, g in fired if h != hand] + [(hand, sequence)]
+                    motions = [(h, g) for h, g in motions if h != hand]
+        for hand, gesture in fired + motions:
+            if gesture.startswith(UNVOTED_PREFIXES):
+                # These never reach GestureStates, so their cooldowns are applied here
+                last = unvoted_fired.get((hand, gesture))
+                if last is not None and current_time - last < cooldown_table.get(gesture, cooldown):
+                    metrics.count("cooldown_suppressed")
+                    continue
+                unvoted_fired[(hand, gesture)] = current_time
+            metrics.count("triggers")
+            gesture_start_time = current_time
+            gesture_text = gesture_label(gesture)
+            # The table is swapped whole by run(), so one read gives a consistent view
+            action = action_table.get(gesture)
+            if action:
+                action()
+        if not hand_features:
             gesture_text = ""
             gesture_start_time = None
-            last_fingers_up = -1
-
-        if gesture_text:
-            cv2.putText(frame, gesture_text, (frame.shape[1] - 300, 50),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-        cv2.putText(frame, Instruction, (10, 450), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-
-        cv2.imshow('Hand Tracking', frame)
+        elif gesture_start_time and current_time - gesture_start_time >= 2:
+            gesture_text = ""
 
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
+        if recorder:
+            # Recordings hold one hand, the first one found
+            if hand_features:
+                recorder.append(clock.time(), hand_features[0].raw, hand_features[0].handedness, observations[0][1])
+            else:
+                recorder.append(clock.time())
+        if not use_pipeline:
+            governor.mark("classify")
+        session.frame_processed()
+
+        key = None
+        if renderer:
+            status = governor.status() if not use_pipeline else ""
+            key = renderer.render(frame, hand_features, gesture_text, status, Instruction)
+        if use_pipeline:
+            pipe.release_frame(slot)
+            metrics.observe("frame", (time.perf_counter() - frame_started) * 1000)
+        else:
+            governor.mark("render")
+            governor.end_frame()
+        command = commands.poll() if commands else None
+        if key == ord('q') or command == "quit":
             mode = "exit"
             break
-        elif key == ord('t'):
+        elif key == ord('t') or command == "ui":
             # Switch to UI mode
             mode = "ui_relaunch"
             break
 
-    cap.release()
-    cv2.destroyAllWindows()
-    hands.close()
-
-def run():
-    global gesture_mappings, custom_gestures, mode
-    mode = "ui_relaunch"  # start with UI
-
-    while True:
-        if mode == "ui_relaunch":
-            # Relaunch UI
-            mode = None
-            gesture_mappings_local, custom_gestures_local = launch_ui(gesture_mappings, custom_gestures)
-            with gesture_mappings_lock:
-                gesture_mappings = gesture_mappings_local
-                custom_gestures = custom_gestures_local
-            if mode is None:
-                # If no mode changed, means Save & Start pressed
-                mode = "capture"
-        elif mode == "capture_gesture":
-            # Capture a new gesture
-            mode = None
-            start_gesture_capture()
-            # After capturing a gesture, go back to UI
-            mode = "ui_relaunch"
-        elif mode == "capture":
-            # Start capturing gestures
-            main_capture_loop()
-            if mode == "exit":
+    if commands:
+        commands.stop_listening()
+    if renderer:
+        renderer.close()
+
+def run(use_pipeline=False, use_roi=False, budget_ms=None, key_delay=0.0, burst_policy="coalesce",
+        key_backend="pyautogui", headless=False, preview_fps=PREVIEW_FPS, prewarm=True, replay=None, speed=1.0,
+        record=None, metrics_port=None, metrics_log=None, vote_window=VOTE_WINDOW, cooldown=DEFAULT_COOLDOWN,
+        max_hands=1, predict=None):
+    global mode, action_sink
+    # start with UI, or straight into recognition when replaying a recording
+    mode = "capture" if replay else "ui_relaunch"
+    commands = CommandReader() if headless else None
+
+    # One camera, model and key output for the whole run, paused while the UI is open
+    session = CaptureSession(0, use_pipeline, use_roi, key_delay, burst_policy, key_backend, replay, speed, max_hands)
+    action_sink = session.send_action
+    # Recompiled with the command line's scale before anything is recognized
+    install_settings(gesture_mappings, custom_gestures, finger_patterns, combos, sequences)
+    if prewarm:
+        # Camera and model come up while the mapping UI is open
+        session.prewarm()
+    recorder = LandmarkRecorder(record) if record else None
+    exporters = []
+    if metrics_port is not None:
+        from metrics import MetricsServer
+        exporters.append(MetricsServer(session.metrics, metrics_port))
+    if metrics_log:
+        from metrics import MetricsLogger
+        exporters.append(MetricsLogger(session.metrics, metrics_log))
+
+    try:
+        while True:
+            if mode == "ui_relaunch":
+                # Relaunch UI
+                mode = None
+                settings = launch_ui(gesture_mappings, custom_gestures, finger_patterns, combos, sequences)
+                install_settings(*settings)
+                if mode is None:
+                    # If no mode changed, means Save & Start pressed
+                    mode = "capture"
+            elif mode == "capture_gesture":
+                # Capture a new gesture
+                mode = None
+                session.resume("gesture capture")
+                start_gesture_capture(session)
+                session.pause()
+                # After capturing a gesture, go back to UI
+                mode = "ui_relaunch"
+            elif mode == "capture":
+                # Start capturing gestures
+                session.resume("capture")
+                install_actions(session.supports_key)
+                if combos and max_hands < 2:
+                    logger.warning("%d two-hand combo(s) configured but only one hand is tracked, "
+                                   "start with --max-hands 2 to use them", len(combos))
+                main_capture_loop(session, budget_ms, headless, preview_fps, commands, recorder, vote_window, cooldown,
+                                  predict)
+                session.pause()
+                if mode == "exit":
+                    break
+                # if loop ends with ui_relaunch or capture_gesture, continue loop
+            elif mode == "exit":
                 break
-            # if loop ends with ui_relaunch or capture_gesture, continue loop
-        elif mode == "exit":
-            break
-        else:
-            # If none of the above, break to avoid infinite loops
-            break
+            else:
+                # If none of the above, break to avoid infinite loops
+                break
+    finally:
+        for exporter in exporters:
+            exporter.close()
+        session.close()
+        if recorder:
+            recorder.close()
+            print(recorder.summary())
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Map hand gestures to keyboard shortcuts.")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run capture, inference and key injection in separate processes")
+    parser.add_argument("--roi", action="store_true",
+                        help="run inference on a crop around the last detected hand")
+    parser.add_argument("--scale", choices=["max", "bone"], default=NORMALIZE_SCALE,
+                        help="hand scale used to normalize landmarks for custom gestures")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="per-frame latency budget; skip or downscale inference when it is exceeded")
+    parser.add_argument("--key-delay", type=float, default=0.0,
+                        help="seconds between the keys of a hotkey")
+    parser.add_argument("--burst-policy", choices=POLICIES, default="coalesce",
+                        help="what to drop when gestures trigger faster than keys can be injected")
+    parser.add_argument("--key-backend", choices=sorted(BACKENDS), default="pyautogui",
+                        help="how keys are injected: pyautogui, X11 XTEST, Linux uinput or an in-memory mock")
+    parser.add_argument("--headless", action="store_true",
+                        help="no preview window; quit or go back to the UI with q/t on stdin or SIGTERM/SIGUSR1")
+    parser.add_argument("--preview-fps", type=float, default=PREVIEW_FPS,
+                        help="how often the preview window is redrawn, 0 for every frame")
+    parser.add_argument("--no-prewarm", dest="prewarm", action="store_false",
+                        help="open the camera and load the model only when capture starts")
+    parser.add_argument("--replay", metavar="PATH", default=None,
+                        help="recognize from a video file, a --record directory or an .npz landmark recording "
+                             "instead of the camera")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed, 0 for as fast as possible")
+    parser.add_argument("--record", metavar="DIR", default=None,
+                        help="record landmarks, handedness and detected gestures of every frame to DIR")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve frame, detection and trigger counters and stage latency histograms "
+                             "in the Prometheus format at http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-log", metavar="SECONDS", type=float, default=None,
+                        help="log a JSON snapshot of the same metrics every SECONDS")
+    parser.add_argument("--vote-window", type=int, default=VOTE_WINDOW,
+                        help="frames a gesture is voted over; it fires once it holds a majority of them")
+    parser.add_argument("--cooldown", type=float, default=DEFAULT_COOLDOWN,
+                        help="seconds before the same gesture can fire again, unless its mapping sets 'cooldown'")
+    parser.add_argument("--max-hands", type=int, choices=[1, 2], default=1,
+                        help="hands tracked at once; 2 enables two-hand combos but keeps MediaPipe's palm "
+                             "detector running while only one hand is visible")
+    parser.add_argument("--predict", metavar="MAX_STRIDE", type=int, nargs="?", const=MAX_STRIDE, default=None,
+                        help="run hand inference only every few frames, at most every MAX_STRIDE (default "
+                             f"{MAX_STRIDE}) while the hand is still, and predict the landmarks in between")
+    args = parser.parse_args()
+    if args.replay and args.pipeline:
+        parser.error("--replay cannot be combined with --pipeline")
+    if args.predict is not None and args.pipeline:
+        parser.error("--predict cannot be combined with --pipeline")
+    if args.predict is not None and args.predict < 1:
+        parser.error("--predict needs a stride of at least 1")
+    if args.vote_window < 1:
+        parser.error("--vote-window needs at least 1 frame")
+    NORMALIZE_SCALE = args.scale
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+    run(use_pipeline=args.pipeline, use_roi=args.roi, budget_ms=args.budget_ms,
+        key_delay=args.key_delay, burst_policy=args.burst_policy, key_backend=args.key_backend,
+        headless=args.headless, preview_fps=args.preview_fps, prewarm=args.prewarm,
+        replay=args.replay, speed=args.speed, record=args.record, metrics_port=args.metrics_port,
+        metrics_log=args.metrics_log, vote_window=args.vote_window, cooldown=args.cooldown, max_hands=args.max_hands,
+        predict=args.predict)
@@ -0,0 +1,111 @@
+import collections
+import logging
+import threading
+import time
+
+from key_backends import create_backend
+
+logger = logging.getLogger("gesture.dispatcher")
+
+POLICIES = ("coalesce", "drop_oldest", "drop_newest")
+
+
+class ActionDispatcher:
+    """Injects key actions on a worker thread so the frame loop never waits on key injection.
+
+    submit() queues a mapping ({'type': 'single'|'hotkey', 'keys': [...]})
+    and returns at once. At most max_pending actions wait; under a burst
+    the policy decides what gives way:
+
+    - "coalesce": an action identical to one still waiting is dropped, and
+      so is a new action when the queue is full.
+    - "drop_oldest": the oldest waiting action is discarded to make room.
+    - "drop_newest": the new action is discarded when the queue is full.
+
+    Keys go out through a KeyBackend (pyautogui unless told otherwise);
+    inter_key_delay (seconds) is the only wait between the keys of a
+    hotkey. Enqueue and injection times are kept for the last history
+    actions, and injection times also go to metrics when one is given.
+    An action the backend fails on is logged and counted in failed; the
+    worker carries on with the next one.
+    """
+
+    def __init__(self, max_pending=4, inter_key_delay=0.0, policy="coalesce", history=1000, backend=None,
+                 metrics=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown burst policy '{policy}', expected one of {', '.join(POLICIES)}")
+        self.max_pending = max_pending
+        self.inter_key_delay = inter_key_delay
+        self.policy = policy
+        self.backend = backend if backend is not None else create_backend()
+        self.pending = collections.deque()
+        self.cond = threading.Condition()
+        self.timings = collections.deque(maxlen=history)
+        self.metrics = metrics
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._worker, name="action-dispatcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, mapping):
+        """Queue a mapping for injection; returns False if the burst policy dropped it."""
+        item = (mapping['type'], tuple(mapping['keys']), time.perf_counter())
+        with self.cond:
+            self.submitted += 1
+            if self.policy == "coalesce" and any(p[:2] == item[:2] for p in self.pending):
+                self.dropped += 1
+                return False
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                if self.policy != "drop_oldest":
+                    return False
+                self.pending.popleft()
+            self.pending.append(item)
+            self.cond.notify()
+        return True
+
+    def _inject(self, action_type, keys):
+        if action_type == 'single':
+            self.backend.press(keys[0])
+        elif action_type == 'hotkey':
+            self.backend.hotkey(keys, self.inter_key_delay)
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                action_type, keys, enqueued = self.pending.popleft()
+            started = time.perf_counter()
+            try:
+                self._inject(action_type, keys)
+            except Exception:
+                self.failed += 1
+                logger.exception("Could not inject %s %s", action_type, "+".join(keys))
+                continue
+            finished = time.perf_counter()
+            self.timings.append((keys, enqueued, started, finished))
+            if self.metrics:
+                self.metrics.observe("inject", (finished - started) * 1000)
+                self.metrics.observe("action_queue", (started - enqueued) * 1000)
+
+    def latency_summary(self):
+        if not self.timings:
+            return f"Actions: {self.submitted} submitted, {self.dropped} dropped, {self.failed} failed"
+        waits = sorted((started - enqueued) * 1000 for _, enqueued, started, _ in self.timings)
+        totals = sorted((finished - enqueued) * 1000 for _, enqueued, _, finished in self.timings)
+        return (f"Actions: {self.submitted} submitted, {self.dropped} dropped, {self.failed} failed, "
+                f"enqueue->inject median {waits[len(waits) // 2]:.2f} ms, "
+                f"enqueue->done median {totals[len(totals) // 2]:.2f} ms max {totals[-1]:.2f} ms")
+
+    def close(self, timeout=2.0):
+        """Finish the actions already queued and stop the worker."""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(timeout=timeout)
+        self.backend.close()
@@ -0,0 +1,158 @@
+import functools
+import logging
+from types import MappingProxyType
+
+logger = logging.getLogger("gesture.actions")
+
+# Every recognizer reports a gesture id "<kind>:<name>", so finger counts,
+# custom gestures, finger patterns, motions, two-hand combos and sequences share one key space
+FINGERS_PREFIX = "fingers:"
+CUSTOM_PREFIX = "custom:"
+PATTERN_PREFIX = "pattern:"
+MOTION_PREFIX = "motion:"
+COMBO_PREFIX = "combo:"
+SEQUENCE_PREFIX = "sequence:"
+# Between the left and right hand's gesture ids in a combo
+COMBO_SEPARATOR = " + "
+# Between the gesture ids of a sequence's steps
+SEQUENCE_SEPARATOR = ", "
+# The thumb is not counted, see count_fingers, so counts go from 0 to 4
+MAX_FINGERS = 4
+# Prebuilt so the frame loop does not format a string per frame
+FINGER_IDS = tuple(f"{FINGERS_PREFIX}{count}" for count in range(MAX_FINGERS + 1))
+
+
+def finger_id(count):
+    return FINGER_IDS[count]
+
+
+def custom_id(name):
+    return CUSTOM_PREFIX + name
+
+
+def pattern_id(pattern):
+    return PATTERN_PREFIX + pattern
+
+
+def motion_id(name):
+    return MOTION_PREFIX + name
+
+
+def combo_key(left, right):
+    """Settings key of a combo from the gesture ids of the left and right hand."""
+    return left + COMBO_SEPARATOR + right
+
+
+def combo_id(left, right):
+    return COMBO_PREFIX + combo_key(left, right)
+
+
+def sequence_key(steps):
+    """Settings key of a sequence from the gesture ids of its steps."""
+    return SEQUENCE_SEPARATOR.join(steps)
+
+
+def check_gesture_name(name):
+    """Raise ValueError for a custom gesture name that would be split apart in a combo or sequence key."""
+    if "," in name or COMBO_SEPARATOR in name:
+        raise ValueError(f"'{name}' cannot be used: gesture names may not contain a comma or "
+                         f"'{COMBO_SEPARATOR}', which separate the gestures of sequences and combos")
+
+
+def parse_gesture_id(text, custom_gestures, finger_patterns):
+    """Gesture id for what a user typed: a finger count, a configured finger pattern or a custom gesture name."""
+    text = text.strip()
+    # A single digit, as five digits like 00001 are a finger pattern
+    if len(text) == 1 and text.isdigit():
+        if int(text) > MAX_FINGERS:
+            raise ValueError(f"'{text}' is not a finger count: the thumb is not counted, so counts go from 0 to "
+                             f"{MAX_FINGERS}. Use the finger pattern 11111 for an open palm.")
+        return finger_id(int(text))
+    if text.lower() in finger_patterns:
+        return pattern_id(text.lower())
+    if text in custom_gestures:
+        check_gesture_name(text)
+        return _custom_gesture_id(text, custom_gestures[text])
+    raise ValueError(f"'{text}' is not a finger count (0-{MAX_FINGERS}), a finger pattern or a custom gesture")
+
+
+def _custom_gesture_id(name, g_data):
+    # Motion gestures are stored with the custom poses but recognized separately
+    return motion_id(name) if 'trajectory' in g_data else custom_id(name)
+
+
+def gesture_label(gesture_id):
+    """Text shown on the preview when a gesture triggers."""
+    kind, _, name = gesture_id.partition(":")
+    if kind + ":" == FINGERS_PREFIX:
+        return f"{name} Finger(s) Up"
+    if kind + ":" == PATTERN_PREFIX:
+        return f"Pattern: {name}"
+    if kind + ":" == MOTION_PREFIX:
+        return f"Motion: {name}"
+    if kind + ":" == COMBO_PREFIX:
+        left, _, right = name.partition(COMBO_SEPARATOR)
+        return f"Combo: left {gesture_label(left)} + right {gesture_label(right)}"
+    if kind + ":" == SEQUENCE_PREFIX:
+        return "Sequence: " + ", then ".join(gesture_label(step) for step in name.split(SEQUENCE_SEPARATOR))
+    return f"Custom: {name}"
+
+
+def _prebuilt_action(mapping, send):
+    # A private copy, so later edits to the settings dicts cannot leak into a compiled table
+    action = {'type': mapping['type'], 'keys': list(mapping['keys'])}
+    return functools.partial(send, action)
+
+
+def compile_action_table(gesture_mappings, custom_gestures, finger_patterns, send, combos=None, sequences=None,
+                         supports=None):
+    """Resolve every mapped gesture, combo and sequence to a ready-to-call action.
+
+    Returns a read-only {gesture_id: action} mapping; calling action() hands
+    its prebuilt mapping to send. Like the template matcher the table is
+    never modified: when the settings change a new one is compiled and
+    swapped in with a single assignment, so readers need no lock. With
+    supports, a key backend's check, mappings using a key it cannot send
+    are left out with a warning instead of failing at injection time.
+    """
+    entries = []
+    for count, mapping in gesture_mappings.items():
+        entries.append((f"{FINGERS_PREFIX}{int(count)}", mapping))
+    for name, g_data in custom_gestures.items():
+        entries.append((_custom_gesture_id(name, g_data), g_data))
+    for pattern, mapping in finger_patterns.items():
+        entries.append((pattern_id(pattern), mapping))
+    for key, mapping in (combos or {}).items():
+        entries.append((COMBO_PREFIX + key, mapping))
+    for key, mapping in (sequences or {}).items():
+        entries.append((SEQUENCE_PREFIX + key, mapping))
+    table = {}
+    for gesture, mapping in entries:
+        unsupported = [key for key in mapping['keys'] if supports and not supports(key)]
+        if unsupported:
+            logger.warning("%s is not mapped: the key backend cannot send %s", gesture_label(gesture),
+                           ", ".join(unsupported))
+            continue
+        table[gesture] = _prebuilt_action(mapping, send)
+    return MappingProxyType(table)
+
+
+def compile_cooldowns(gesture_mappings, custom_gestures, finger_patterns, combos=None, sequences=None):
+    """Read-only {gesture_id: seconds} for the mappings that set their own 'cooldown'."""
+    cooldowns = {}
+    for key, mapping in (combos or {}).items():
+        if 'cooldown' in mapping:
+            cooldowns[COMBO_PREFIX + key] = float(mapping['cooldown'])
+    for key, mapping in (sequences or {}).items():
+        if 'cooldown' in mapping:
+            cooldowns[SEQUENCE_PREFIX + key] = float(mapping['cooldown'])
+    for count, mapping in gesture_mappings.items():
+        if 'cooldown' in mapping:
+            cooldowns[f"{FINGERS_PREFIX}{int(count)}"] = float(mapping['cooldown'])
+    for name, g_data in custom_gestures.items():
+        if 'cooldown' in g_data:
+            cooldowns[_custom_gesture_id(name, g_data)] = float(g_data['cooldown'])
+    for pattern, mapping in finger_patterns.items():
+        if 'cooldown' in mapping:
+            cooldowns[pattern_id(pattern)] = float(mapping['cooldown'])
+    return MappingProxyType(cooldowns)
@@ -0,0 +1,84 @@
+"""End-to-end trigger-to-keystroke latency of the action dispatcher, headless, using the mock key backend.
+
+Usage: python benchmarks/bench_dispatch.py [--actions N] [--rate HZ] [--hotkey-len K] [--policy P] [--backend mock]
+Prints a human-readable summary followed by one JSON line.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from action_dispatcher import ActionDispatcher, POLICIES
+from key_backends import BACKENDS, create_backend
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=30.0, help="triggers per second")
+    parser.add_argument("--hotkey-len", type=int, default=3, help="keys per action, 1 for single presses")
+    parser.add_argument("--key-delay", type=float, default=0.0)
+    parser.add_argument("--policy", choices=POLICIES, default="coalesce")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="mock")
+    args = parser.parse_args()
+
+    backend = create_backend(args.backend)
+    dispatcher = ActionDispatcher(inter_key_delay=args.key_delay, policy=args.policy,
+                                  history=args.actions, backend=backend)
+    keys = [chr(ord('a') + i) for i in range(args.hotkey_len)]
+    mapping = {'type': 'single', 'keys': keys} if args.hotkey_len == 1 else {'type': 'hotkey', 'keys': keys}
+
+    period = 1.0 / args.rate
+    submit_ms = []
+    start = time.perf_counter()
+    for i in range(args.actions):
+        target = start + i * period
+        while time.perf_counter() < target:
+            time.sleep(min(0.001, max(0.0, target - time.perf_counter())))
+        before = time.perf_counter()
+        dispatcher.submit(mapping)
+        submit_ms.append((time.perf_counter() - before) * 1000)
+    dispatcher.close(timeout=10.0)
+
+    first_key_ms = []
+    last_key_ms = []
+    if args.backend == "mock":
+        events = backend.events
+        per_action = 2 * len(keys)
+        for n, (_, enqueued, _, _) in enumerate(dispatcher.timings):
+            action_events = events[n * per_action:(n + 1) * per_action]
+            first_key_ms.append((action_events[0][0] - enqueued) * 1000)
+            last_key_ms.append((action_events[-1][0] - enqueued) * 1000)
+    else:
+        first_key_ms = [(started - enqueued) * 1000 for _, enqueued, started, _ in dispatcher.timings]
+        last_key_ms = [(finished - enqueued) * 1000 for _, enqueued, _, finished in dispatcher.timings]
+
+    result = {
+        "backend": args.backend,
+        "policy": args.policy,
+        "actions": args.actions,
+        "injected": len(dispatcher.timings),
+        "dropped": dispatcher.dropped,
+        "submit_ms_p50": percentile(submit_ms, 0.5),
+        "submit_ms_max": max(submit_ms),
+        "first_key_ms_p50": percentile(first_key_ms, 0.5),
+        "first_key_ms_p95": percentile(first_key_ms, 0.95),
+        "last_key_ms_p50": percentile(last_key_ms, 0.5),
+        "last_key_ms_p95": percentile(last_key_ms, 0.95),
+    }
+    print(f"{result['injected']}/{args.actions} actions injected via {args.backend} ({result['dropped']} dropped)")
+    print(f"submit() p50 {result['submit_ms_p50']:.3f} ms, max {result['submit_ms_max']:.3f} ms")
+    print(f"trigger -> first key p50 {result['first_key_ms_p50']:.3f} ms, p95 {result['first_key_ms_p95']:.3f} ms")
+    print(f"trigger -> last key  p50 {result['last_key_ms_p50']:.3f} ms, p95 {result['last_key_ms_p95']:.3f} ms")
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
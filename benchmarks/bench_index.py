@@ -0,0 +1,80 @@
+"""Query latency of custom gesture matching against library size: brute-force matrix vs cluster index.
+
+Usage: python benchmarks/bench_index.py [--sizes 10 100 1000 10000] [--queries N]
+Libraries are synthetic: base poses from a low-rank pose model, each captured several times with noise.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gesture_templates import TemplateIndex, TemplateMatrix, MATCH_THRESHOLD
+from landmarks import normalize_landmark_array
+
+
+def random_pose(rng, basis):
+    # Hand poses vary along a few joint angles, so sample them from a low-rank model
+    return (rng.normal(0, 1, len(basis)) @ basis).reshape(21, 3)
+
+
+def make_library(size, rng, basis, templates_per_gesture=4):
+    gestures = {}
+    num_gestures = max(1, size // templates_per_gesture)
+    for g in range(num_gestures):
+        base = random_pose(rng, basis)
+        poses = [normalize_landmark_array(base + rng.normal(0, 0.02, (21, 3))).tolist()
+                 for _ in range(min(templates_per_gesture, size))]
+        gestures[f"gesture_{g}"] = {'type': 'single', 'keys': ['space'],
+                                    'landmarks': poses[0], 'extra_templates': poses[1:]}
+    return gestures
+
+
+def make_queries(library, count, rng, basis):
+    names = sorted(library)
+    queries = []
+    for i in range(count):
+        template = np.array(library[names[i % len(names)]]['landmarks'])
+        if i % 4 == 3:
+            # A quarter of the queries are poses that are not in the library
+            template = random_pose(rng, basis)
+        queries.append(normalize_landmark_array(template + rng.normal(0, 0.02, (21, 3))))
+    return queries
+
+
+def time_matcher(matcher, queries):
+    results = []
+    start = time.perf_counter()
+    for normalized in queries:
+        name, dist, _ = matcher.match(normalized)
+        results.append(name if dist < MATCH_THRESHOLD else None)
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pose-dims", type=int, default=8, help="degrees of freedom of the synthetic poses")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    basis = rng.normal(0, 0.15, (args.pose_dims, 63))
+    print(f"{'templates':>9} {'matrix us':>10} {'index us':>10} {'build ms':>9} {'agree':>6}")
+    for size in args.sizes:
+        library = make_library(size, rng, basis)
+        queries = make_queries(library, args.queries, rng, basis)
+        matrix = TemplateMatrix(library)
+        start = time.perf_counter()
+        index = TemplateIndex(library)
+        build_ms = (time.perf_counter() - start) * 1000
+        matrix_us, expected = time_matcher(matrix, queries)
+        index_us, actual = time_matcher(index, queries)
+        agree = sum(a == b for a, b in zip(expected, actual)) / len(queries)
+        print(f"{len(matrix):>9} {matrix_us:>10.1f} {index_us:>10.1f} {build_ms:>9.1f} {agree:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
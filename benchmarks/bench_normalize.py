@@ -0,0 +1,79 @@
+"""Micro-benchmark of landmark normalization: the original pure-Python loop against the NumPy version.
+
+Usage: python benchmarks/bench_normalize.py [--repeat N] [--settings settings.json]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from landmarks import landmarks_to_array, normalize_landmark_array
+
+
+def normalize_landmarks_python(landmarks):
+    # Reference copy of the original implementation
+    coords = [(lm.x, lm.y, lm.z) for lm in landmarks.landmark]
+    wrist = coords[0]
+    coords = [(x - wrist[0], y - wrist[1], z - wrist[2]) for (x, y, z) in coords]
+
+    max_dist = max(math.sqrt((x2 - x1)**2 + (y2 - y1)**2 + (z2 - z1)**2)
+                   for i, (x1, y1, z1) in enumerate(coords)
+                   for j, (x2, y2, z2) in enumerate(coords) if i != j)
+    if max_dist > 0:
+        coords = [(x/max_dist, y/max_dist, z/max_dist) for (x, y, z) in coords]
+    return coords
+
+
+def random_hand(rng):
+    points = [SimpleNamespace(x=rng.uniform(0.3, 0.7), y=rng.uniform(0.3, 0.7), z=rng.uniform(-0.1, 0.1))
+              for _ in range(21)]
+    return SimpleNamespace(landmark=points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--settings", help="also check equivalence on the templates of a settings.json")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    hands = [random_hand(rng) for _ in range(100)]
+
+    max_error = 0.0
+    for hand in hands:
+        expected = np.array(normalize_landmarks_python(hand))
+        actual = normalize_landmark_array(landmarks_to_array(hand))
+        max_error = max(max_error, float(np.abs(expected - actual).max()))
+    print(f"max abs difference on random hands: {max_error:.2e}")
+
+    if args.settings:
+        with open(args.settings) as f:
+            custom_gestures = json.load(f).get("custom_gestures", {})
+        template_error = 0.0
+        for g_data in custom_gestures.values():
+            template = np.array(g_data['landmarks'])
+            template_error = max(template_error, float(np.abs(normalize_landmark_array(template) - template).max()))
+        print(f"max abs difference renormalizing {len(custom_gestures)} stored templates: {template_error:.2e}")
+
+    hand = hands[0]
+    array = landmarks_to_array(hand)
+    results = {
+        "python": timeit.timeit(lambda: normalize_landmarks_python(hand), number=args.repeat),
+        "numpy max": timeit.timeit(lambda: normalize_landmark_array(landmarks_to_array(hand)), number=args.repeat),
+        "numpy max (array in)": timeit.timeit(lambda: normalize_landmark_array(array), number=args.repeat),
+        "numpy bone (array in)": timeit.timeit(lambda: normalize_landmark_array(array, "bone"), number=args.repeat),
+    }
+    baseline = results["python"]
+    for name, total in results.items():
+        print(f"{name:>22}: {total / args.repeat * 1e6:8.2f} us/call  {baseline / total:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
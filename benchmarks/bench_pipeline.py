@@ -0,0 +1,285 @@
+"""Per-stage timings of the recognition loop, each stage in isolation and the whole frame end to end.
+
+Usage: python benchmarks/bench_pipeline.py [--video recording.mp4] [--frames N] [--library-sizes 0 10 100 1000]
+                                           [--actions N] [--action-rate HZ] [--output results.json]
+
+Frames come from --video (decoded once up front, decoding is timed as
+cap_read) or are synthetic noise. Landmarks are synthetic poses from a
+low-rank model placed in image coordinates, so every classifier stage runs
+without a camera or a model. hands_process (with max_num_hands 1 and 2)
+and the end-to-end run with inference are skipped when MediaPipe cannot be loaded. Prints a table and
+then the full results as one JSON document (or writes it to --output) for
+comparing commits.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import NewGesture
+from action_dispatcher import ActionDispatcher
+from gesture_templates import compile_templates
+from key_backends import create_backend
+from landmarks import HandFeatures, normalize_landmark_array
+from motion_gestures import MotionTracker, compile_motion_templates, trajectory_from_hands, MOTION_FRAMES
+from gesture_sequences import SequenceMatcher, compile_sequences
+from landmark_predictor import LandmarkPredictor
+from action_table import FINGER_IDS, sequence_key
+from overlay import draw_hand
+from bench_index import make_library, random_pose
+
+FRAME_SHAPE = (480, 640, 3)
+
+
+def timed(fn, items):
+    """Call fn on every item and return per-call times in microseconds."""
+    times = []
+    for item in items:
+        start = time.perf_counter_ns()
+        fn(item)
+        times.append((time.perf_counter_ns() - start) / 1000)
+    return times
+
+
+def paced(fn, items, rate):
+    """timed(), but starting the calls 1/rate seconds apart, as triggers arrive with camera frames."""
+    period = 1.0 / rate
+    times = []
+    start = time.perf_counter()
+    for i, item in enumerate(items):
+        target = start + i * period
+        while time.perf_counter() < target:
+            time.sleep(min(0.001, max(0.0, target - time.perf_counter())))
+        before = time.perf_counter_ns()
+        fn(item)
+        times.append((time.perf_counter_ns() - before) / 1000)
+    return times
+
+
+def stats(times):
+    times = sorted(times)
+    if not times:
+        return None
+    return {
+        "n": len(times),
+        "mean_us": sum(times) / len(times),
+        "p50_us": times[len(times) // 2],
+        "p95_us": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "max_us": times[-1],
+    }
+
+
+def load_frames(video, count, rng):
+    if not video:
+        return [rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8) for _ in range(count)], []
+    cap = cv2.VideoCapture(video)
+    frames = []
+    read_times = []
+    while len(frames) < count:
+        start = time.perf_counter_ns()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        read_times.append((time.perf_counter_ns() - start) / 1000)
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"No frames could be read from {video}")
+    return frames, read_times
+
+
+def synthetic_hands(count, rng, basis):
+    # Normalized poses scaled to a plausible hand size and placed in the middle of the image
+    return [(normalize_landmark_array(random_pose(rng, basis)) * 0.35 + (0.5, 0.55, 0.0)).astype(np.float32)
+            for _ in range(count)]
+
+
+def load_hands(max_hands=1):
+    try:
+        import mediapipe as mp
+        return mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=max_hands,
+                                        min_detection_confidence=0.5, min_tracking_confidence=0.5), None
+    except Exception as exc:  # missing package or a build without the solutions API
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+def classify(features):
+    NewGesture.count_fingers(features)
+    NewGesture.recognize_custom_gesture(features)
+    NewGesture.recognize_finger_pattern(features)
+
+
+def environment(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "video": args.video,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default=None, help="recorded frames to use instead of synthetic noise")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--library-sizes", type=int, nargs="+", default=[0, 10, 100, 1000],
+                        help="custom gesture template counts to time recognize_custom_gesture with")
+    parser.add_argument("--motion-templates", type=int, default=10,
+                        help="motion gesture templates to time the trajectory matcher with")
+    parser.add_argument("--pose-dims", type=int, default=8, help="degrees of freedom of the synthetic poses")
+    parser.add_argument("--actions", type=int, default=100, help="actions submitted to time dispatch with")
+    parser.add_argument("--action-rate", type=float, default=30.0,
+                        help="actions per second, paced like gestures firing from camera frames")
+    parser.add_argument("--output", default=None, help="write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    basis = rng.normal(0, 0.15, (args.pose_dims, 63))
+    frames, read_times = load_frames(args.video, args.frames, rng)
+    raw_hands = synthetic_hands(len(frames), rng, basis)
+    hands, skipped = load_hands()
+    results = {"environment": environment(args), "stages": {}, "custom_gesture_library": {}, "skipped": {}}
+    results["environment"]["frames"] = len(frames)
+    stages = results["stages"]
+
+    if read_times:
+        stages["cap_read"] = stats(read_times)
+    flipped = [cv2.flip(frame, 1) for frame in frames]
+    stages["cv2_flip"] = stats(timed(lambda frame: cv2.flip(frame, 1), frames))
+    stages["cv2_cvtColor"] = stats(timed(lambda frame: cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), flipped))
+    rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in flipped]
+    if hands:
+        stages["hands_process"] = stats(timed(hands.process, rgb_frames))
+        # With room for a second hand the palm detector keeps running while fewer are found
+        two_hands, _ = load_hands(max_hands=2)
+        stages["hands_process_max_2"] = stats(timed(two_hands.process, rgb_frames))
+        two_hands.close()
+    else:
+        results["skipped"]["hands_process"] = skipped
+
+    stages["normalize_landmarks"] = stats(timed(normalize_landmark_array, raw_hands))
+    stages["hand_features"] = stats(timed(HandFeatures, raw_hands))
+    features = [HandFeatures(raw) for raw in raw_hands]
+    predictor = LandmarkPredictor()
+    predictor.correct(features[:1], 0.0)
+    predictor.correct(features[1:2], 1 / 30.0)
+    stages["landmark_predict"] = stats(timed(lambda i: predictor.predict((i + 2) / 30.0), range(len(frames))))
+    stages["count_fingers"] = stats(timed(NewGesture.count_fingers, features))
+    stages["recognize_finger_pattern"] = stats(timed(NewGesture.recognize_finger_pattern, features))
+
+    for size in args.library_sizes:
+        library = make_library(size, rng, basis) if size else {}
+        NewGesture.compiled_templates = compile_templates(library)
+        results["custom_gesture_library"][str(size)] = stats(timed(NewGesture.recognize_custom_gesture, features))
+    # The remaining stages run against the largest library
+    stages["recognize_custom_gesture"] = results["custom_gesture_library"][str(args.library_sizes[-1])]
+
+    # Two hands per frame: features built as one batch, templates matched hand by hand or in one lookup
+    pairs = [np.stack(raw_hands[i:i + 2]) for i in range(0, len(raw_hands) - 1, 2)]
+    stages["hand_features_2_hands"] = stats(timed(HandFeatures.batch, pairs))
+    pair_features = [HandFeatures.batch(pair) for pair in pairs]
+    stages["recognize_custom_2_hands_loop"] = stats(timed(
+        lambda hand_features: [NewGesture.recognize_custom_gesture(features) for features in hand_features],
+        pair_features))
+    stages["recognize_custom_2_hands"] = stats(timed(NewGesture.recognize_custom_gestures, pair_features))
+
+    # Consecutive synthetic hands make a jittery trajectory, which is all the matcher's cost depends on
+    motions = compile_motion_templates({
+        f"motion{i}": {'trajectory': trajectory_from_hands(raw_hands[i:i + MOTION_FRAMES]).tolist()}
+        for i in range(args.motion_templates)
+    })
+    trajectories = [trajectory_from_hands(raw_hands[i:i + MOTION_FRAMES])
+                    for i in range(max(1, len(raw_hands) - MOTION_FRAMES))]
+    stages["motion_match"] = stats(timed(motions.match, trajectories))
+    tracker = MotionTracker()
+    # Frames at the camera's 30 fps, so the window is full after MOTION_SECONDS
+    stages["motion_update"] = stats(timed(lambda item: tracker.update(item[1], motions, item[0] / 30.0),
+                                          list(enumerate(raw_hands))))
+
+    # Every three-step sequence of finger counts, with a held gesture that changes every few frames
+    matcher = SequenceMatcher(compile_sequences({
+        sequence_key([a, b, c]): {'type': 'single', 'keys': ['space']}
+        for a in FINGER_IDS for b in FINGER_IDS for c in FINGER_IDS
+    }))
+    counts = rng.integers(0, len(FINGER_IDS), len(frames))
+    held = [(i / 30.0, FINGER_IDS[counts[i // 4]]) for i in range(len(frames))]
+    stages["sequence_update"] = stats(timed(lambda step: matcher.update("Right", step[1], step[0]), held))
+
+    canvases = [frame.copy() for frame in flipped]
+    stages["overlay_draw"] = stats(timed(lambda pair: draw_hand(*pair), zip(canvases, features)))
+
+    # drop_newest only drops when the queue is full, so every paced action should be injected and timed
+    dispatcher = ActionDispatcher(policy="drop_newest", history=args.actions, backend=create_backend("mock"))
+    stages["action_submit"] = stats(paced(dispatcher.submit,
+                                          [{'type': 'single', 'keys': [chr(ord('a') + i % 26)]}
+                                           for i in range(args.actions)], args.action_rate))
+    dispatcher.close(timeout=10.0)
+    stages["action_trigger_to_done"] = stats([(finished - enqueued) * 1e6
+                                              for _, enqueued, _, finished in dispatcher.timings])
+    results["dispatch"] = {"actions": args.actions, "rate": args.action_rate, "injected": len(dispatcher.timings),
+                           "dropped": dispatcher.dropped}
+
+    def end_to_end(with_inference):
+        dispatcher = ActionDispatcher(backend=create_backend("mock"))
+        times = []
+        last = None
+        for frame, raw in zip(frames, raw_hands):
+            start = time.perf_counter_ns()
+            frame = cv2.flip(frame, 1)
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if with_inference:
+                hands.process(rgb_frame)
+            hand = HandFeatures(raw)
+            classify(hand)
+            draw_hand(frame, hand)
+            gesture = NewGesture.count_fingers(hand)
+            if gesture != last:
+                dispatcher.submit({'type': 'single', 'keys': ['space']})
+                last = gesture
+            times.append((time.perf_counter_ns() - start) / 1000)
+        dispatcher.close(timeout=10.0)
+        return stats(times)
+
+    stages["end_to_end_no_inference"] = end_to_end(False)
+    if hands:
+        stages["end_to_end"] = end_to_end(True)
+        hands.close()
+    else:
+        results["skipped"]["end_to_end"] = skipped
+
+    print(f"{'stage':<30} {'mean us':>10} {'p50 us':>10} {'p95 us':>10}")
+    for name, row in stages.items():
+        print(f"{name:<30} {row['mean_us']:>10.1f} {row['p50_us']:>10.1f} {row['p95_us']:>10.1f}")
+    for size, row in results["custom_gesture_library"].items():
+        print(f"{'custom library ' + size:<30} {row['mean_us']:>10.1f} {row['p50_us']:>10.1f} {row['p95_us']:>10.1f}")
+    dispatch = results["dispatch"]
+    print(f"actions: {dispatch['injected']}/{dispatch['actions']} injected at {dispatch['rate']:g}/s, "
+          f"{dispatch['dropped']} dropped")
+    for name, reason in results["skipped"].items():
+        print(f"{name}: skipped ({reason})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
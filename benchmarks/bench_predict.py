@@ -0,0 +1,113 @@
+"""Accuracy of landmark prediction between inference frames, measured on recorded sessions.
+
+Usage: python benchmarks/bench_predict.py RECORDING [RECORDING ...] [--strides 2 3 4] [--output results.json]
+
+RECORDING is a --record directory or an .npz landmark recording. Every
+recorded frame is taken as what full inference would have returned. Each
+strategy only sees the frames it would have inferred and fills in the
+others, and those estimates are compared with the recording:
+  hold      reuses the last inferred landmarks, as a skipped frame under --budget-ms does
+  fixed     predicts with constant velocity, inferring every N frames
+  adaptive  predicts and adapts the stride to hand speed, up to N (--predict N)
+Reported per strategy: the share of frames inferred, the mean and p95
+landmark error in hand sizes, how often the finger state differs from the
+recording and how often a hand in view is missed.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_sources import LandmarkStreamSource
+from landmark_predictor import LandmarkPredictor
+from landmarks import HandFeatures
+
+
+def load_frames(path):
+    source = LandmarkStreamSource(path, speed=0)
+    frames = []
+    while True:
+        ret, _ = source.read()
+        if not ret:
+            break
+        truth = HandFeatures(source.landmarks, handedness=source.handedness) if source.landmarks is not None else None
+        frames.append((source.clock.time(), truth))
+    return frames
+
+
+def evaluate(frames, strategy, stride):
+    predictor = LandmarkPredictor(stride)
+    if strategy != "adaptive":
+        # Still as far as the stride is concerned, so it only drops to 1 for a newly found hand
+        predictor.slow_speed = predictor.fast_speed = float("inf")
+    held = []
+    inferred = 0
+    errors = []
+    finger_mismatches = 0
+    missed = 0
+    compared = 0
+    for now, truth in frames:
+        if predictor.should_infer():
+            inferred += 1
+            held = [truth] if truth is not None else []
+            predictor.correct(held, now)
+            continue
+        estimate = predictor.predict(now)
+        if strategy == "hold":
+            estimate = held
+        if truth is None:
+            continue
+        compared += 1
+        if not estimate:
+            missed += 1
+            continue
+        distances = np.sqrt(((estimate[0].raw[:, :2] - truth.raw[:, :2]) ** 2).sum(axis=1))
+        errors.append(float(distances.mean()) / max(truth.scale, 1e-6))
+        finger_mismatches += estimate[0].finger_code != truth.finger_code
+    errors.sort()
+    return {
+        "inferred": inferred / max(len(frames), 1),
+        "frames_compared": compared,
+        "mean_error": sum(errors) / len(errors) if errors else None,
+        "p95_error": errors[min(len(errors) - 1, int(len(errors) * 0.95))] if errors else None,
+        "finger_mismatch": finger_mismatches / max(compared, 1),
+        "missed": missed / max(compared, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument("--strides", type=int, nargs="+", default=[2, 3, 4],
+                        help="inference strides, the largest stride for the adaptive strategy")
+    parser.add_argument("--output", default=None, help="write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'recording':<24} {'strategy':<14} {'inferred':>9} {'mean err':>9} {'p95 err':>9} "
+          f"{'fingers':>8} {'missed':>7}")
+    for path in args.recordings:
+        frames = load_frames(path)
+        name = os.path.relpath(path)[-24:]
+        results[path] = {}
+        for stride in args.strides:
+            for strategy in ("hold", "fixed", "adaptive"):
+                row = evaluate(frames, strategy, stride)
+                results[path][f"{strategy}_{stride}"] = row
+                mean = f"{row['mean_error']:.4f}" if row["mean_error"] is not None else "-"
+                p95 = f"{row['p95_error']:.4f}" if row["p95_error"] is not None else "-"
+                print(f"{name:<24} {strategy + ' ' + str(stride):<14} {row['inferred']:>9.1%} {mean:>9} {p95:>9} "
+                      f"{row['finger_mismatch']:>8.1%} {row['missed']:>7.1%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
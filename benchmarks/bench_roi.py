@@ -0,0 +1,88 @@
+"""Compare per-frame hands.process time on full frames against the hand-ROI crop path.
+
+Usage: python benchmarks/bench_roi.py VIDEO [--frames N] [--max-hands 1|2]
+VIDEO is a recording with a hand in view (or a camera index such as 0).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hand_roi import HandRoiTracker
+
+
+def make_hands(max_hands=1):
+    return mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=max_hands,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+def load_frames(source, limit):
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def time_path(frames, process):
+    timings = []
+    detected = 0
+    for rgb_frame in frames:
+        start = time.perf_counter()
+        multi_hand_landmarks = process(rgb_frame)
+        timings.append((time.perf_counter() - start) * 1000)
+        if multi_hand_landmarks:
+            detected += 1
+    return timings, detected
+
+
+def report(name, timings, detected):
+    timings_sorted = sorted(timings)
+    p95 = timings_sorted[min(len(timings_sorted) - 1, int(len(timings_sorted) * 0.95))]
+    print(f"{name:>6}: mean {statistics.mean(timings):6.2f} ms  median {statistics.median(timings):6.2f} ms  "
+          f"p95 {p95:6.2f} ms  detected {detected}/{len(timings)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--max-hands", type=int, choices=[1, 2], default=1,
+                        help="hands the model looks for, as with NewGesture.py --max-hands")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        sys.exit(f"No frames read from {args.video}")
+
+    full_hands = make_hands(args.max_hands)
+    full_timings, full_detected = time_path(frames, lambda f: full_hands.process(f).multi_hand_landmarks)
+    full_hands.close()
+
+    roi_hands = make_hands(args.max_hands)
+    tracker = HandRoiTracker(roi_hands, max_hands=args.max_hands)
+    roi_timings, roi_detected = time_path(frames, tracker.process)
+    roi_hands.close()
+
+    print(f"{len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}")
+    report("full", full_timings, full_detected)
+    report("roi", roi_timings, roi_detected)
+    print(tracker.summary())
+    print(f"speedup: {statistics.mean(full_timings) / statistics.mean(roi_timings):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
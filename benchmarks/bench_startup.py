@@ -0,0 +1,189 @@
+"""Startup time of the entry scripts: imports, first UI paint and first processed frame.
+
+Usage: python benchmarks/bench_startup.py [--scripts NewGesture.py Combined.py] [--runs N] [--video FILE]
+
+Each run starts the script in a fresh interpreter with -X importtime. The
+first Tk mainloop() is replaced by one update() and a close, which counts
+as the first paint and acts as Save & Start; the first cv2.imshow() counts
+as the first processed frame and ends the run without showing it. --video feeds a file to
+cv2.VideoCapture instead of the camera. Tk needs a display, use xvfb-run on
+a headless box. Prints a human-readable summary followed by one JSON line
+per script.
+"""
+import argparse
+import importlib.abc
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "# startup "
+HEAVY_MODULES = ("cv2", "mediapipe", "numpy", "tkinter", "pyautogui")
+
+
+def _marker(name):
+    sys.stderr.write(f"{MARKER}{name} {time.time():.6f}\n")
+    sys.stderr.flush()
+
+
+class _PatchOnImport(importlib.abc.MetaPathFinder):
+    """Applies a patch to a module right after its first import, without importing it early."""
+
+    def __init__(self, patches):
+        self.patches = patches
+
+    def find_spec(self, name, path, target=None):
+        # Popped first: cv2 re-imports itself while loading and must only be patched once
+        patch = self.patches.pop(name, None)
+        if patch is None:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        exec_module = spec.loader.exec_module
+
+        def patched_exec_module(module):
+            exec_module(module)
+            patch(sys.modules.get(name, module))
+
+        spec.loader.exec_module = patched_exec_module
+        return spec
+
+
+def _patch_tkinter(tkinter):
+    def mainloop(self, n=0):
+        self.update()
+        _marker("first_paint")
+        self.destroy()
+
+    tkinter.Misc.mainloop = mainloop
+
+
+def _patch_cv2(video):
+    def patch(cv2):
+        video_capture = cv2.VideoCapture
+
+        def first_imshow(winname, mat):
+            # The frame is fully processed once it is handed to the preview
+            _marker("first_frame")
+            # Skip cleanup, the camera and worker threads are not what is measured
+            os._exit(0)
+
+        cv2.imshow = first_imshow
+        if video:
+            cv2.VideoCapture = lambda *args, **kwargs: video_capture(video)
+
+    return patch
+
+
+def child(script, video, script_args):
+    _marker("interpreter")
+    sys.meta_path.insert(0, _PatchOnImport({"tkinter": _patch_tkinter, "cv2": _patch_cv2(video)}))
+    sys.path.insert(0, ROOT)
+    sys.argv = [script] + script_args
+    import runpy
+    runpy.run_path(os.path.join(ROOT, script), run_name="__main__")
+    _marker("exit")
+
+
+def parse_stderr(stderr):
+    """Read the child's stderr: marker times, total top-level import ms, ms per heavy module and what was loaded before each marker."""
+    markers = {}
+    heavy = {}
+    loaded_before = {}
+    total_imports = 0.0
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            name, stamp = line[len(MARKER):].split()
+            markers[name] = float(stamp)
+            loaded_before[name] = sorted(heavy)
+            continue
+        fields = line.split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        cumulative = int(fields[1]) / 1000
+        module = fields[2].strip()
+        if module in HEAVY_MODULES:
+            heavy[module] = cumulative
+        # Nested imports are indented under their parent and already in its cumulative time
+        if not fields[2].startswith("  "):
+            total_imports += cumulative
+    return markers, total_imports, heavy, loaded_before
+
+
+def measure(script, video, timeout, script_args):
+    command = [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", script]
+    if video:
+        command += ["--video", video]
+    command += ["--"] + script_args
+    started = time.time()
+    error = None
+    try:
+        proc = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, timeout=timeout)
+        stderr = proc.stderr
+        if proc.returncode:
+            output = [line for line in stderr.splitlines() if not line.startswith(("import time:", MARKER))]
+            error = output[-1] if output else f"exit code {proc.returncode}"
+    except subprocess.TimeoutExpired as exc:
+        stderr = exc.stderr.decode() if isinstance(exc.stderr, bytes) else (exc.stderr or "")
+        error = f"timed out after {timeout:.0f} s"
+    markers, total_imports, heavy, loaded_before = parse_stderr(stderr)
+    run = {name: (stamp - started) * 1000 for name, stamp in markers.items()}
+    run["error"] = error
+    run["import_ms"] = total_imports
+    run["heavy_import_ms"] = heavy
+    run["heavy_before_paint"] = loaded_before.get("first_paint")
+    return run
+
+
+def median(values):
+    values = sorted(v for v in values if v is not None)
+    return values[len(values) // 2] if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scripts", nargs="+", default=["NewGesture.py", "Combined.py"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--video", default=None, help="video file used instead of the camera")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before a run is abandoned")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("script_args", nargs="*", help="arguments passed to every script, after --")
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.video, args.script_args)
+        return
+
+    for script in args.scripts:
+        runs = [measure(script, args.video, args.timeout, args.script_args) for _ in range(args.runs)]
+        result = {"script": script, "runs": args.runs}
+        for key in ("interpreter", "first_paint", "first_frame", "import_ms"):
+            result[f"{key}_ms" if not key.endswith("_ms") else key] = median(run.get(key) for run in runs)
+        for module in HEAVY_MODULES:
+            result[f"{module}_import_ms"] = median(run["heavy_import_ms"].get(module) for run in runs)
+        result["heavy_before_paint"] = runs[-1]["heavy_before_paint"]
+        result["errors"] = sorted({run["error"] for run in runs if run["error"]})
+
+        def fmt(value):
+            return "n/a" if value is None else f"{value:.0f} ms"
+
+        print(f"{script}: interpreter {fmt(result['interpreter_ms'])}, first paint {fmt(result['first_paint_ms'])}, "
+              f"first frame {fmt(result['first_frame_ms'])} (median of {args.runs})")
+        print(f"  imports {fmt(result['import_ms'])}; "
+              + ", ".join(f"{module} {fmt(result[f'{module}_import_ms'])}" for module in HEAVY_MODULES))
+        if result["heavy_before_paint"] is not None:
+            print(f"  loaded before first paint: {', '.join(result['heavy_before_paint']) or 'none'}")
+        for error in result["errors"]:
+            print(f"  error: {error}")
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import queue
+import signal
+import sys
+import threading
+
+# Accepted spellings of the commands the preview window takes as 'q' and 't'
+COMMANDS = {"q": "quit", "quit": "quit", "exit": "quit", "t": "ui", "ui": "ui"}
+SIGNAL_COMMANDS = {"SIGTERM": "quit", "SIGINT": "quit", "SIGUSR1": "ui"}
+
+
+class CommandReader:
+    """Quit and back-to-UI commands for runs without a preview window.
+
+    One line per command is read from stdin on a background thread, and
+    while listen() is in effect SIGTERM/SIGINT mean quit and SIGUSR1 means
+    back to the UI. Commands typed while not listening are discarded.
+    """
+
+    def __init__(self, stream=None):
+        self.commands = queue.SimpleQueue()
+        self.previous_handlers = {}
+        stream = sys.stdin if stream is None else stream
+        if stream is not None:
+            threading.Thread(target=self._read, args=(stream,), name="command-reader", daemon=True).start()
+
+    def _read(self, stream):
+        for line in stream:
+            word = line.strip().lower()
+            if not word:
+                continue
+            command = COMMANDS.get(word)
+            if command:
+                self.commands.put(command)
+            else:
+                print(f"Unknown command '{word}', use q to quit or t to go back to the UI")
+
+    def _on_signal(self, signum, frame):
+        self.commands.put(SIGNAL_COMMANDS[signal.Signals(signum).name])
+
+    def listen(self):
+        while self.poll():
+            pass
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for name in SIGNAL_COMMANDS:
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                self.previous_handlers[signum] = signal.signal(signum, self._on_signal)
+
+    def stop_listening(self):
+        for signum, handler in self.previous_handlers.items():
+            signal.signal(signum, handler)
+        self.previous_handlers = {}
+
+    def poll(self):
+        """Return the next pending command ("quit" or "ui"), or None."""
+        try:
+            return self.commands.get_nowait()
+        except queue.Empty:
+            return None
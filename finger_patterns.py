@@ -0,0 +1,44 @@
+FINGER_NAMES = ("thumb", "index", "middle", "ring", "pinky")
+WILDCARDS = "x*?"
+
+
+def parse_pattern(pattern):
+    """Parse a finger pattern into (mask, value) bit fields.
+
+    Patterns have one character per finger from thumb to pinky: '1' for
+    extended, '0' for curled and 'x' (or '*', '?') for either, so "01100"
+    is index and middle up and "x1000" is index up whatever the thumb does.
+    """
+    if len(pattern) != len(FINGER_NAMES):
+        raise ValueError(f"Pattern '{pattern}' must have {len(FINGER_NAMES)} characters, thumb to pinky")
+    mask = 0
+    value = 0
+    for bit, char in enumerate(pattern):
+        if char in WILDCARDS:
+            continue
+        if char not in "01":
+            raise ValueError(f"Pattern '{pattern}' may only contain 0, 1 or x")
+        mask |= 1 << bit
+        if char == "1":
+            value |= 1 << bit
+    return mask, value
+
+
+def code_to_pattern(code):
+    return "".join("1" if code >> bit & 1 else "0" for bit in range(len(FINGER_NAMES)))
+
+
+def compile_pattern_table(patterns):
+    """Resolve every 5-bit finger code to the most specific matching pattern.
+
+    Returns a 32-entry tuple indexed by HandFeatures.finger_code holding the
+    pattern string or None. Among overlapping patterns the one with fewer
+    wildcards wins, then the alphabetically first.
+    """
+    parsed = sorted((-bin(mask).count("1"), pattern, mask, value)
+                    for pattern in patterns
+                    for mask, value in [parse_pattern(pattern)])
+    table = []
+    for code in range(1 << len(FINGER_NAMES)):
+        table.append(next((pattern for _, pattern, mask, value in parsed if code & mask == value), None))
+    return tuple(table)
@@ -0,0 +1,97 @@
+import threading
+import collections
+import time
+
+import cv2
+
+
+class LatestFrameGrabber:
+    """Reads a camera on its own thread and always hands out the newest frame.
+
+    Exposes the parts of the cv2.VideoCapture interface the scripts use
+    (isOpened/read/release) so it can replace it directly.
+    """
+
+    def __init__(self, device=0, buffer_size=2, capture=None):
+        self.cap = capture if capture is not None else cv2.VideoCapture(device)
+        self.frames = collections.deque(maxlen=buffer_size)
+        self.cond = threading.Condition()
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.active = threading.Event()
+        self.active.set()
+        self.running = self.cap.isOpened()
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        if self.running:
+            self.thread.start()
+
+    def _reader(self):
+        while self.running:
+            if not self.active.is_set():
+                # Paused: keep the device open but stop pulling frames from it
+                self.active.wait(0.1)
+                continue
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            with self.cond:
+                # A full ring buffer means the oldest frame is never going to be consumed
+                if len(self.frames) == self.frames.maxlen:
+                    self.frames_dropped += 1
+                self.frames.append(frame)
+                self.frames_read += 1
+                self.cond.notify()
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    def isOpened(self):
+        return self.running or bool(self.frames)
+
+    def read(self, timeout=None):
+        """Return (ret, frame) for the newest unread frame, dropping older ones.
+
+        Like cv2.VideoCapture.read it blocks until a frame arrives, so ret is
+        only False at the end of the stream. With a timeout it also gives up
+        after that many seconds; isOpened() then tells a slow camera apart
+        from a closed one.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.cond:
+            while not self.frames:
+                if not self.running:
+                    return False, None
+                if deadline is None:
+                    self.cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, None
+                self.cond.wait(remaining)
+            frame = self.frames.pop()
+            self.frames_dropped += len(self.frames)
+            self.frames.clear()
+        return True, frame
+
+    def pause(self):
+        self.active.clear()
+        with self.cond:
+            self.frames.clear()
+
+    def resume(self):
+        with self.cond:
+            self.frames.clear()
+        self.active.set()
+
+    def summary(self):
+        return f"Frames read: {self.frames_read}, dropped: {self.frames_dropped}"
+
+    def release(self):
+        with self.cond:
+            self.running = False
+            # Wakes a read() blocked waiting for a frame
+            self.cond.notify_all()
+        self.active.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.cap.release()
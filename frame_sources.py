@@ -0,0 +1,154 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+from frame_grabber import LatestFrameGrabber
+from landmark_recorder import HANDEDNESS, open_recording
+
+# Landmark streams carry no pixels, the preview gets a blank frame of this size
+BLANK_FRAME_SHAPE = (480, 640, 3)
+
+
+class ReplayClock:
+    """Time as seen by the recognition loop.
+
+    Live sources leave it on the wall clock. Recorded sources set it to each
+    frame's recorded timestamp, so cooldowns and hold times measured against
+    it come out the same whatever the playback speed.
+    """
+
+    def __init__(self):
+        self.now = None
+
+    def time(self):
+        return time.time() if self.now is None else self.now
+
+    def advance(self, timestamp):
+        self.now = timestamp
+
+
+class CameraSource(LatestFrameGrabber):
+    """The live camera; frames need inference and time is the wall clock."""
+
+    needs_inference = True
+    landmarks = None
+
+
+class _RecordedSource:
+    """Plays recorded frames in order, paced to their timestamps divided by speed (0 for as fast as possible)."""
+
+    needs_inference = True
+    landmarks = None
+
+    def __init__(self, speed=1.0, clock=None):
+        self.speed = speed
+        self.clock = clock if clock is not None else ReplayClock()
+        self.first_timestamp = None
+        self.started = None
+        self.frames_read = 0
+        self.finished = False
+
+    def _pace(self, timestamp):
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+            self.started = time.perf_counter()
+        elif self.speed > 0:
+            delay = self.started + (timestamp - self.first_timestamp) / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.clock.advance(timestamp)
+        self.frames_read += 1
+
+    def isOpened(self):
+        return not self.finished
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        # Playback continues where it stopped, without catching up on the paused time
+        self.first_timestamp = None
+
+    def summary(self):
+        return f"Frames replayed: {self.frames_read}"
+
+    def release(self):
+        self.finished = True
+
+
+class VideoFileSource(_RecordedSource):
+    """Frames from a video file, every frame in order, timestamped by the file's frame rate."""
+
+    def __init__(self, path, speed=1.0, clock=None):
+        super().__init__(speed, clock)
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Cannot open video '{path}'")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self, timeout=1.0):
+        if self.finished:
+            return False, None
+        ret, frame = self.cap.read()
+        if not ret:
+            self.finished = True
+            return False, None
+        self._pace(self.frames_read / self.fps)
+        return True, frame
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+class LandmarkStreamSource(_RecordedSource):
+    """Recorded landmarks replayed without running inference at all.
+
+    The recording is either a LandmarkRecorder directory, mapped without
+    copying, or an .npz file with 'timestamps' (N,) in seconds, 'landmarks'
+    (N, 21, 3) float32 in mirrored image coordinates, 'present' (N,) bool
+    for frames that had a hand and optionally 'handedness' (N,) int8. After
+    each read() the landmarks and handedness attributes describe the frame.
+    """
+
+    needs_inference = False
+    handedness = None
+
+    def __init__(self, path, speed=1.0, clock=None):
+        super().__init__(speed, clock)
+        if os.path.isdir(path):
+            columns, _ = open_recording(path)
+        else:
+            with np.load(path) as data:
+                columns = {name: data[name] for name in data.files}
+        self.timestamps = np.asarray(columns["timestamps"], dtype=np.float64)
+        self.all_landmarks = np.asarray(columns["landmarks"], dtype=np.float32)
+        self.present = np.asarray(columns["present"], dtype=bool)
+        self.all_handedness = columns.get("handedness")
+        self.blank = np.zeros(BLANK_FRAME_SHAPE, dtype=np.uint8)
+        self.position = 0
+
+    def read(self, timeout=1.0):
+        if self.position >= len(self.timestamps):
+            self.finished = True
+            return False, None
+        i = self.position
+        self.position += 1
+        self._pace(float(self.timestamps[i]))
+        self.landmarks = self.all_landmarks[i] if self.present[i] else None
+        code = int(self.all_handedness[i]) if self.all_handedness is not None else -1
+        self.handedness = HANDEDNESS[code] if code >= 0 else None
+        # The preview may draw on it, so it is cleared for every frame
+        self.blank.fill(0)
+        return True, self.blank
+
+
+def open_source(replay=None, device=0, speed=1.0, clock=None):
+    """The camera when replay is None, otherwise a video file or a landmark recording (directory or .npz)."""
+    if replay is None:
+        return CameraSource(device)
+    if os.path.isdir(replay) or os.path.splitext(replay)[1].lower() == ".npz":
+        return LandmarkStreamSource(replay, speed, clock)
+    return VideoFileSource(replay, speed, clock)
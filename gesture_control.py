@@ -1,9 +1,10 @@
 import cv2
 import mediapipe as mp
 import time
-import pyautogui
 from gesture_ui import launch_ui
 import threading
+from frame_grabber import LatestFrameGrabber
+from key_backends import create_backend
 
 # Initialize MediaPipe Hands
 mp_hands = mp.solutions.hands
@@ -18,7 +19,8 @@ hands = mp_hands.Hands(
 )
 
 # Open the webcam
-cap = cv2.VideoCapture(0)
+cap = LatestFrameGrabber(0)
+key_backend = create_backend()
 
 # Thread-safe variable for gesture mappings
 gesture_mappings_lock = threading.Lock()
@@ -110,9 +112,9 @@ while cap.isOpened():
                     if fingers_up in gesture_mappings:
                         mapping = gesture_mappings[fingers_up]
                         if mapping['type'] == 'single':
-                            pyautogui.press(mapping['keys'][0])  # Single key
+                            key_backend.press(mapping['keys'][0])  # Single key
                         elif mapping['type'] == 'hotkey':
-                            pyautogui.hotkey(*mapping['keys'])  # Hotkey
+                            key_backend.hotkey(mapping['keys'])  # Hotkey
 
             # Maintain the text for 2 seconds
             if gesture_start_time and time.time() - gesture_start_time >= 2:
@@ -135,5 +137,7 @@ while cap.isOpened():
         threading.Thread(target=update_gesture_mappings, daemon=True).start()
 
 cap.release()
+key_backend.close()
+print(cap.summary())
 cv2.destroyAllWindows()
 hands.close()
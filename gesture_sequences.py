@@ -0,0 +1,125 @@
+from action_table import SEQUENCE_PREFIX, SEQUENCE_SEPARATOR
+
+# Seconds allowed between one gesture of a sequence and the next
+DEFAULT_STEP_TIMEOUT = 0.8
+
+
+def sequence_steps(key):
+    """Gesture ids of a sequence from its settings key."""
+    return key.split(SEQUENCE_SEPARATOR)
+
+
+class _Node:
+    __slots__ = ("children", "sequence", "timeout")
+
+    def __init__(self):
+        self.children = {}
+        # Action id of the sequence ending here, if one does
+        self.sequence = None
+        # Longest step timeout of the sequences continuing from here
+        self.timeout = 0.0
+
+
+class SequenceTrie:
+    """Configured gesture sequences as a trie of gesture ids.
+
+    Sequences sharing a prefix share its nodes, so however many are
+    configured, following one more gesture is a single dict lookup. Like
+    the action table it is compiled from the settings and swapped whole.
+    """
+
+    def __init__(self, sequences, default_timeout=DEFAULT_STEP_TIMEOUT):
+        self.root = _Node()
+        self.count = 0
+        for key, mapping in sequences.items():
+            steps = sequence_steps(key)
+            if len(steps) < 2:
+                continue
+            timeout = float(mapping.get('timeout', default_timeout))
+            node = self.root
+            for step in steps:
+                node.timeout = max(node.timeout, timeout)
+                node = node.children.setdefault(step, _Node())
+            node.sequence = SEQUENCE_PREFIX + key
+            # Bounds how long a completed sequence waits for a longer one that continues it
+            node.timeout = max(node.timeout, timeout)
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+
+class _HandState:
+    __slots__ = ("node", "last_step", "held")
+
+    def __init__(self, root):
+        self.node = root
+        self.last_step = 0.0
+        self.held = None
+
+
+class SequenceMatcher:
+    """Follows each hand through a SequenceTrie as its held gesture changes.
+
+    update() is called once per frame and hand with the gesture the hand
+    holds; a change to a new gesture is one step, anything else only checks
+    the step timeout, so both are O(1). A gesture that does not continue the
+    current path may start a new one. When a sequence is also the prefix
+    of a longer one it completes once the next gesture does not continue it
+    or its timeout passes.
+    """
+
+    def __init__(self, trie):
+        self.trie = trie
+        self.hands = {}
+
+    def _state(self, hand):
+        state = self.hands.get(hand)
+        if state is None:
+            state = self.hands[hand] = _HandState(self.trie.root)
+        return state
+
+    def update(self, hand, held, now):
+        """Returns the action id of a sequence completed by hand, or None."""
+        state = self._state(hand)
+        if held == state.held:
+            return self._expire(state, now)
+        state.held = held
+        if held is None:
+            return self._expire(state, now)
+        return self.advance(hand, held, now)
+
+    def advance(self, hand, gesture, now):
+        """Take one step with gesture, for events that are not held such as motions."""
+        state = self._state(hand)
+        root = self.trie.root
+        completed = self._expire(state, now)
+        node = state.node.children.get(gesture)
+        if node is None:
+            if state.node is not root:
+                # A completed sequence that was waiting for a longer one ends here
+                completed = state.node.sequence
+            node = root.children.get(gesture)
+        if node is None:
+            state.node = root
+        elif node.children:
+            state.node = node
+            state.last_step = now
+        else:
+            state.node = root
+            completed = node.sequence
+        return completed
+
+    def _expire(self, state, now):
+        node = state.node
+        if node is self.trie.root or now - state.last_step <= node.timeout:
+            return None
+        state.node = self.trie.root
+        return node.sequence
+
+    def reset(self):
+        self.hands.clear()
+
+
+def compile_sequences(sequences):
+    return SequenceTrie(sequences)
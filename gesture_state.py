@@ -0,0 +1,120 @@
+import collections
+
+VOTE_WINDOW = 5
+ENTER_VOTES = 3
+EXIT_VOTES = 2
+# Seconds from a gesture firing until it can fire again, once it has been released and made again
+DEFAULT_COOLDOWN = 0.5
+
+
+class HandGestureState:
+    """Debounces the per-frame classification of one hand.
+
+    The last window classifications are kept in a ring buffer with a
+    running vote count, so update() is O(1). A gesture becomes stable (and fires)
+    once it holds enter_votes of the window and stays stable until it
+    drops below exit_votes, so a single flickering frame neither fires nor
+    releases anything. Holding a pose fires once; releasing it and making
+    it again fires again, but not before its cooldown has passed.
+    """
+
+    def __init__(self, window=VOTE_WINDOW, enter_votes=ENTER_VOTES, exit_votes=EXIT_VOTES):
+        if not 0 < exit_votes <= enter_votes <= window:
+            raise ValueError("Votes must satisfy 0 < exit_votes <= enter_votes <= window")
+        self.enter_votes = enter_votes
+        self.exit_votes = exit_votes
+        self.recent = collections.deque(maxlen=window)
+        self.votes = collections.Counter()
+        self.stable = None
+        self.last_fired = {}
+
+    def update(self, gesture, now, cooldowns, default_cooldown):
+        """Add one frame's classification (None for nothing).
+
+        Returns (fired, suppressed): the gesture that became stable and may
+        fire, or the one that became stable but is still cooling down.
+        """
+        recent = self.recent
+        votes = self.votes
+        if len(recent) == recent.maxlen:
+            oldest = recent[0]
+            votes[oldest] -= 1
+            if not votes[oldest]:
+                del votes[oldest]
+        recent.append(gesture)
+        votes[gesture] += 1
+
+        if self.stable is not None and votes[self.stable] >= self.exit_votes:
+            return None, None
+        self.stable = None
+        if votes[gesture] < self.enter_votes or gesture is None:
+            # The newest frame decides: only a gesture just seen can have reached enter_votes
+            return None, None
+        self.stable = gesture
+        last = self.last_fired.get(gesture)
+        if last is not None and now - last < cooldowns.get(gesture, default_cooldown):
+            return None, gesture
+        self.last_fired[gesture] = now
+        return gesture, None
+
+    def reset(self):
+        self.recent.clear()
+        self.votes.clear()
+        self.stable = None
+
+
+class GestureStates:
+    """One HandGestureState per hand, keyed by handedness.
+
+    update() takes every hand seen in a frame; hands that were not seen get
+    a None vote so their gesture is released after a few frames. Unless
+    given, enter_votes is a majority of the window and exit_votes one less.
+    Cooldowns map gesture ids to seconds, others use default_cooldown. Gestures
+    that reach a stable state within their cooldown are counted as
+    cooldown_suppressed on metrics when one is given.
+    """
+
+    def __init__(self, window=VOTE_WINDOW, enter_votes=None, exit_votes=None, default_cooldown=DEFAULT_COOLDOWN,
+                 cooldowns=None, metrics=None):
+        self.window = window
+        self.enter_votes = enter_votes or window // 2 + 1
+        self.exit_votes = exit_votes or max(1, self.enter_votes - 1)
+        self.default_cooldown = default_cooldown
+        self.cooldowns = cooldowns if cooldowns is not None else {}
+        self.metrics = metrics
+        self.hands = {}
+
+    def _state(self, hand):
+        state = self.hands.get(hand)
+        if state is None:
+            state = self.hands[hand] = HandGestureState(self.window, self.enter_votes, self.exit_votes)
+        return state
+
+    def update(self, observations, now):
+        """observations is a list of (hand, gesture); returns the list of (hand, gesture) that fire."""
+        fired = []
+        seen = set()
+        for hand, gesture in observations:
+            seen.add(hand)
+            self._record(hand, self._state(hand).update(gesture, now, self.cooldowns, self.default_cooldown),
+                         fired)
+        for hand, state in self.hands.items():
+            if hand not in seen and state.recent:
+                self._record(hand, state.update(None, now, self.cooldowns, self.default_cooldown), fired)
+        return fired
+
+    def stable(self, hand):
+        """The gesture hand is holding, None when it holds none or was never seen."""
+        state = self.hands.get(hand)
+        return state.stable if state is not None else None
+
+    def _record(self, hand, result, fired):
+        gesture, suppressed = result
+        if gesture is not None:
+            fired.append((hand, gesture))
+        elif suppressed is not None and self.metrics:
+            self.metrics.count("cooldown_suppressed")
+
+    def reset(self):
+        for state in self.hands.values():
+            state.reset()
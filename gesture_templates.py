@@ -0,0 +1,183 @@
+import numpy as np
+
+from landmarks import normalize_landmark_array
+
+MATCH_THRESHOLD = 0.2  # mean landmark distance, .2 works well
+# Below this many templates a brute-force scan beats the index
+INDEX_MIN_TEMPLATES = 400
+# Fingertips first: they separate poses best, so partial distances grow fastest
+LANDMARK_ORDER = np.array([4, 8, 12, 16, 20, 3, 7, 11, 15, 19, 2, 6, 10, 14, 18, 1, 5, 9, 13, 17, 0])
+LANDMARK_CHUNKS = [(0, 5), (5, 13), (13, 21)]
+
+
+def gesture_templates(g_data):
+    """All stored poses of one custom gesture: its first capture plus any extra ones (none for a motion gesture)."""
+    if 'landmarks' not in g_data:
+        return []
+    return [g_data['landmarks']] + g_data.get('extra_templates', [])
+
+
+def mean_distances(templates, normalized):
+    """Mean per-landmark distance from a normalized (21, 3) hand to each (N, 21, 3) template."""
+    diffs = templates - normalized
+    return np.sqrt(np.einsum("gij,gij->gi", diffs, diffs)).mean(axis=1)
+
+
+class TemplateMatrix:
+    """Custom gesture templates compiled into one contiguous (N, 21, 3) array.
+
+    A gesture may own several rows. Instances are immutable once built;
+    when the gesture library changes a new one is compiled and swapped in
+    with a single assignment.
+    """
+
+    def __init__(self, custom_gestures, scale_method="max"):
+        self.names = tuple(sorted(custom_gestures))
+        rows = []
+        label_ids = []
+        for i, g_name in enumerate(self.names):
+            for template in gesture_templates(custom_gestures[g_name]):
+                if scale_method != "max":
+                    # Stored templates are already wrist-centered and max-scaled
+                    template = normalize_landmark_array(template, scale_method)
+                rows.append(template)
+                label_ids.append(i)
+        self.templates = np.array(rows, dtype=np.float32).reshape(len(rows), 21, 3)
+        self.label_ids = np.array(label_ids, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.templates)
+
+    def distances(self, normalized):
+        return mean_distances(self.templates, normalized)
+
+    def match(self, normalized):
+        """Return (name, distance, margin) of the closest template, or (None, inf, inf) when empty.
+
+        margin is how much further away the closest template of any other gesture is.
+        """
+        if not len(self.templates):
+            return None, float('inf'), float('inf')
+        distances = self.distances(normalized)
+        best = int(np.argmin(distances))
+        best_dist = float(distances[best])
+        others = distances[self.label_ids != self.label_ids[best]]
+        margin = float(others.min()) - best_dist if others.size else float('inf')
+        return self.names[self.label_ids[best]], best_dist, margin
+
+    def match_many(self, normalized):
+        """match() for every hand of an (H, 21, 3) stack with one distance computation, as a list of triples."""
+        if not len(self.templates):
+            return [(None, float('inf'), float('inf'))] * len(normalized)
+        diffs = self.templates[None] - normalized[:, None]
+        distances = np.sqrt(np.einsum("hgij,hgij->hgi", diffs, diffs)).mean(axis=2)
+        matches = []
+        for hand_distances in distances:
+            best = int(np.argmin(hand_distances))
+            best_dist = float(hand_distances[best])
+            others = hand_distances[self.label_ids != self.label_ids[best]]
+            margin = float(others.min()) - best_dist if others.size else float('inf')
+            matches.append((self.names[self.label_ids[best]], best_dist, margin))
+        return matches
+
+
+class TemplateIndex(TemplateMatrix):
+    """TemplateMatrix with a cluster index for libraries of hundreds of templates or more.
+
+    Templates are grouped by a small k-means and each one remembers its
+    distance to its cluster centroid. The mean landmark distance is a
+    metric, so |d(q, c) - d(t, c)| is an exact lower bound on d(q, t): one
+    centroid scan prefilters the whole library. Survivors are re-ranked
+    exactly in batches, nearest bound first, a few landmarks at a time, and
+    dropped as soon as their partial distance passes the current k-th best.
+    """
+
+    def __init__(self, custom_gestures, scale_method="max", iterations=8):
+        super().__init__(custom_gestures, scale_method)
+        count = len(self.templates)
+        num_clusters = max(1, int(np.sqrt(count))) if count else 0
+        flat = self.templates.reshape(count, 21 * 3)
+        rng = np.random.default_rng(0)
+        centroids = flat[rng.choice(count, num_clusters, replace=False)] if count else flat[:0]
+        assignment = np.zeros(count, dtype=np.int64)
+        for _ in range(iterations if count else 0):
+            # Squared euclidean on the flattened vectors is close enough to place centroids
+            sq_dist = (flat * flat).sum(1)[:, None] - 2 * flat @ centroids.T + (centroids * centroids).sum(1)[None, :]
+            assignment = np.argmin(sq_dist, axis=1)
+            for c in range(num_clusters):
+                members = flat[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+
+        order = np.argsort(assignment, kind="stable")
+        self.templates = np.ascontiguousarray(self.templates[order][:, LANDMARK_ORDER])
+        self.label_ids = self.label_ids[order]
+        self.centroids = np.ascontiguousarray(centroids.reshape(-1, 21, 3)[:, LANDMARK_ORDER])
+        counts = np.bincount(assignment, minlength=num_clusters)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.row_cluster = assignment[order]
+        self.member_dist = np.empty(count, dtype=np.float32)
+        for c in range(num_clusters):
+            start, end = offsets[c], offsets[c + 1]
+            self.member_dist[start:end] = mean_distances(self.templates[start:end], self.centroids[c])
+
+    def distances(self, normalized):
+        return mean_distances(self.templates, normalized[LANDMARK_ORDER])
+
+    def _pruned_distances(self, normalized, rows, bound):
+        total = np.zeros(len(rows), dtype=np.float32)
+        limit = bound * 21
+        for lo, hi in LANDMARK_CHUNKS:
+            diffs = self.templates[rows, lo:hi] - normalized[lo:hi]
+            total += np.sqrt(np.einsum("nij,nij->ni", diffs, diffs)).sum(axis=1)
+            keep = total < limit
+            rows, total = rows[keep], total[keep]
+            if not rows.size:
+                break
+        return rows, total / 21
+
+    def query(self, normalized, k=1, threshold=MATCH_THRESHOLD, batch_size=256):
+        """Return up to k (name, distance) pairs for distinct gestures closer than threshold, nearest first."""
+        if not len(self.templates):
+            return []
+        normalized = normalized[LANDMARK_ORDER]
+        centroid_dist = mean_distances(self.centroids, normalized)
+        row_lower = np.abs(centroid_dist[self.row_cluster] - self.member_dist)
+        best = {}
+        bound = threshold
+        # Most promising templates first, so the bound tightens before the bulk is scanned
+        candidates = np.nonzero(row_lower < bound)[0]
+        candidates = candidates[np.argsort(row_lower[candidates], kind="stable")]
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            batch = batch[row_lower[batch] < bound]
+            if not batch.size:
+                break
+            rows, distances = self._pruned_distances(normalized, batch, bound)
+            for row, dist in zip(rows.tolist(), distances.tolist()):
+                label = int(self.label_ids[row])
+                if dist < best.get(label, bound):
+                    best[label] = dist
+            if len(best) >= k:
+                bound = min(threshold, sorted(best.values())[k - 1])
+        ranked = sorted(best.items(), key=lambda item: item[1])[:k]
+        return [(self.names[label], dist) for label, dist in ranked]
+
+    def match(self, normalized):
+        ranked = self.query(normalized, k=2)
+        if not ranked:
+            return None, float('inf'), float('inf')
+        margin = ranked[1][1] - ranked[0][1] if len(ranked) > 1 else float('inf')
+        return ranked[0][0], ranked[0][1], margin
+
+    def match_many(self, normalized):
+        # The index prunes per query, so hands are looked up one at a time
+        return [self.match(hand) for hand in normalized]
+
+
+def compile_templates(custom_gestures, scale_method="max"):
+    """Build the template matcher that suits the size of the library."""
+    count = sum(len(gesture_templates(g_data)) for g_data in custom_gestures.values())
+    if count >= INDEX_MIN_TEMPLATES:
+        return TemplateIndex(custom_gestures, scale_method)
+    return TemplateMatrix(custom_gestures, scale_method)
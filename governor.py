@@ -0,0 +1,91 @@
+import logging
+import time
+
+logger = logging.getLogger("gesture.governor")
+
+# Degradation ladder as (inference stride, inference scale), cheapest last
+LEVELS = [(1, 1.0), (1, 0.75), (2, 0.75), (2, 0.5), (3, 0.5), (4, 0.5)]
+
+
+class InferenceGovernor:
+    """Times each stage of the recognition loop and trades inference work for latency.
+
+    Call begin_frame() at the top of the loop and mark(stage) after each
+    stage. With a budget set, end_frame() moves along LEVELS when the
+    smoothed per-frame cost leaves the budget: it lowers the inference
+    resolution and then skips inference on some frames, and steps back
+    once the load drops. Without a budget it only measures. Stage and
+    whole-frame times are also fed to metrics when one is given.
+    """
+
+    def __init__(self, budget_ms=None, smoothing=0.1, recover_ratio=0.8, settle_frames=15, metrics=None):
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing
+        self.recover_ratio = recover_ratio
+        self.settle_frames = settle_frames
+        self.stage_ms = {}
+        self.level = 0
+        self.frame_index = 0
+        self.frames_since_change = 0
+        self.last_mark = None
+        self.frame_started = None
+        self.metrics = metrics
+
+    @property
+    def stride(self):
+        return LEVELS[self.level][0]
+
+    @property
+    def scale(self):
+        return LEVELS[self.level][1]
+
+    def begin_frame(self):
+        self.frame_index += 1
+        self.frame_started = self.last_mark = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        elapsed = (now - self.last_mark) * 1000
+        self.last_mark = now
+        if self.metrics:
+            self.metrics.observe(stage, elapsed)
+        previous = self.stage_ms.get(stage)
+        if previous is None:
+            self.stage_ms[stage] = elapsed
+        else:
+            self.stage_ms[stage] = previous + self.smoothing * (elapsed - previous)
+
+    def should_infer(self):
+        return self.frame_index % self.stride == 0
+
+    def _predicted_ms(self, level):
+        # Inference is amortized over the stride and assumed to scale with pixel count
+        stride, scale = LEVELS[level]
+        inference_ms = self.stage_ms.get("inference", 0.0) * (scale / self.scale) ** 2
+        other_ms = sum(ms for stage, ms in self.stage_ms.items() if stage != "inference")
+        return other_ms + inference_ms / stride
+
+    def end_frame(self):
+        if self.metrics:
+            self.metrics.observe("frame", (time.perf_counter() - self.frame_started) * 1000)
+        self.frames_since_change += 1
+        if self.budget_ms is None or self.frames_since_change < self.settle_frames:
+            return
+        current_ms = self._predicted_ms(self.level)
+        if current_ms > self.budget_ms and self.level < len(LEVELS) - 1:
+            self._set_level(self.level + 1, current_ms)
+        elif self.level > 0 and self._predicted_ms(self.level - 1) < self.budget_ms * self.recover_ratio:
+            self._set_level(self.level - 1, current_ms)
+
+    def _set_level(self, level, current_ms):
+        self.level = level
+        self.frames_since_change = 0
+        logger.info("%.1f ms/frame against %.1f ms budget -> inference every %d frame(s) at %d%% resolution",
+                    current_ms, self.budget_ms, self.stride, self.scale * 100)
+
+    def status(self):
+        total_ms = sum(self.stage_ms.values())
+        text = f"{total_ms:.1f} ms/frame"
+        if self.budget_ms is not None:
+            text += f" (budget {self.budget_ms:.0f}) infer 1/{self.stride} @ {self.scale:.0%}"
+        return text
@@ -0,0 +1,77 @@
+import itertools
+
+import numpy as np
+
+from landmarks import WRIST
+
+HANDS = ("Left", "Right")
+# Furthest a wrist may move between frames (normalized image units) and still be the same hand
+MAX_JUMP = 0.2
+# Frames a hand may go missing before its last position is forgotten
+FORGET_FRAMES = 15
+
+
+class HandIdentityTracker:
+    """Gives each detected hand a stable 'Left' or 'Right' identity.
+
+    MediaPipe's handedness is right most of the time but can flip for a
+    frame or report the same side for both hands. Hands seen recently are
+    matched to their previous wrist position instead, choosing the
+    assignment with the least total movement; MediaPipe's label only
+    decides for hands that appear without history. When it is missing or
+    both hands claim the same side, the hand further left in the (mirrored)
+    image is the left one. assign() rewrites handedness on the features in
+    place, so everything keyed by it sees the stable identity.
+    """
+
+    def __init__(self, max_jump=MAX_JUMP, forget_frames=FORGET_FRAMES):
+        self.max_jump = max_jump
+        self.forget_frames = forget_frames
+        # label -> (wrist xy, frames since last seen)
+        self.last_seen = {}
+
+    def _by_label(self, hand_features):
+        labels = [features.handedness for features in hand_features]
+        if len(hand_features) == 2 and (labels[0] == labels[1] or None in labels):
+            left_first = hand_features[0].raw[WRIST, 0] <= hand_features[1].raw[WRIST, 0]
+            return HANDS if left_first else HANDS[::-1]
+        return tuple(label if label in HANDS else "Right" for label in labels)
+
+    def assign(self, hand_features):
+        if not hand_features:
+            self._age()
+            return hand_features
+        hand_features = hand_features[:len(HANDS)]
+        wrists = [features.raw[WRIST, :2] for features in hand_features]
+        by_label = self._by_label(hand_features)
+        # At most two hands, so every assignment is scored: most hands continuing a track, then least
+        # movement, then most agreement with MediaPipe
+        best_score, best = None, by_label
+        for labels in itertools.permutations(HANDS, len(wrists)):
+            continued = 0
+            movement = 0.0
+            for wrist, label in zip(wrists, labels):
+                seen = self.last_seen.get(label)
+                if seen is not None:
+                    jump = float(np.hypot(*(wrist - seen[0])))
+                    if jump <= self.max_jump:
+                        continued += 1
+                        movement += jump
+            score = (continued, -movement, sum(a == b for a, b in zip(labels, by_label)))
+            if best_score is None or score > best_score:
+                best_score, best = score, labels
+        self._age()
+        for features, label, wrist in zip(hand_features, best, wrists):
+            features.handedness = label
+            self.last_seen[label] = (wrist.copy(), 0)
+        return hand_features
+
+    def _age(self):
+        for label, (position, age) in list(self.last_seen.items()):
+            if age >= self.forget_frames:
+                del self.last_seen[label]
+            else:
+                self.last_seen[label] = (position, age + 1)
+
+    def reset(self):
+        self.last_seen.clear()
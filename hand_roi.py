@@ -0,0 +1,94 @@
+import numpy as np
+
+
+class HandRoiTracker:
+    """Runs hand inference on a padded crop around the previous frame's hand.
+
+    Landmarks found in the crop are mapped back to full-frame normalized
+    coordinates in place, so callers see the same results as a full-frame
+    hands.process(). When the crop loses the hand the same frame is retried
+    at full resolution. multi_handedness holds the matching handedness
+    results of the last call.
+
+    With max_hands above one the crop covers every tracked hand, and while
+    fewer than max_hands are tracked every redetect_interval-th frame is
+    processed in full, so a hand entering the picture is still found.
+    The hands' bounds are kept in normalized coordinates and turned into a
+    pixel crop for each frame, so the frame size may change between calls
+    (the governor downscales frames under load).
+    """
+
+    def __init__(self, hands, padding=0.3, min_crop=96, max_hands=1, redetect_interval=10):
+        self.hands = hands
+        self.padding = padding
+        self.min_crop = min_crop
+        self.max_hands = max_hands
+        self.redetect_interval = redetect_interval
+        self.roi = None
+        self.hands_found = 0
+        self.crop_streak = 0
+        self.multi_handedness = None
+        self.crop_frames = 0
+        self.full_frames = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _roi_from_landmarks(multi_hand_landmarks):
+        """Normalized (x_min, x_max, y_min, y_max) around every hand."""
+        xs = [lm.x for hand_landmarks in multi_hand_landmarks for lm in hand_landmarks.landmark]
+        ys = [lm.y for hand_landmarks in multi_hand_landmarks for lm in hand_landmarks.landmark]
+        return min(xs), max(xs), min(ys), max(ys)
+
+    def _crop(self, width, height):
+        x_min, x_max, y_min, y_max = self.roi
+        x_min, x_max = x_min * width, x_max * width
+        y_min, y_max = y_min * height, y_max * height
+        # Square crop so the model sees the hand with its usual aspect ratio
+        side = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.padding)
+        side = int(min(max(side, self.min_crop), width, height))
+        cx = (x_min + x_max) / 2
+        cy = (y_min + y_max) / 2
+        x0 = int(min(max(cx - side / 2, 0), width - side))
+        y0 = int(min(max(cy - side / 2, 0), height - side))
+        return x0, y0, side
+
+    def process(self, rgb_frame):
+        """Return multi_hand_landmarks for the frame, or None if no hand was found."""
+        height, width = rgb_frame.shape[:2]
+        if self.roi is not None and (self.hands_found >= self.max_hands or self.crop_streak < self.redetect_interval):
+            x0, y0, side = self._crop(width, height)
+            crop = np.ascontiguousarray(rgb_frame[y0:y0 + side, x0:x0 + side])
+            results = self.hands.process(crop)
+            self.crop_frames += 1
+            if results.multi_hand_landmarks:
+                for hand_landmarks in results.multi_hand_landmarks:
+                    for lm in hand_landmarks.landmark:
+                        lm.x = (lm.x * side + x0) / width
+                        lm.y = (lm.y * side + y0) / height
+                        lm.z = lm.z * side / width
+                self.roi = self._roi_from_landmarks(results.multi_hand_landmarks)
+                self.multi_handedness = results.multi_handedness
+                self.hands_found = len(results.multi_hand_landmarks)
+                self.crop_streak += 1
+                return results.multi_hand_landmarks
+            # Tracking lost, retry this frame at full resolution
+            self.fallbacks += 1
+
+        results = self.hands.process(rgb_frame)
+        self.full_frames += 1
+        self.crop_streak = 0
+        self.hands_found = len(results.multi_hand_landmarks or [])
+        if results.multi_hand_landmarks:
+            self.roi = self._roi_from_landmarks(results.multi_hand_landmarks)
+        else:
+            self.roi = None
+        self.multi_handedness = results.multi_handedness
+        return results.multi_hand_landmarks
+
+    def reset(self):
+        """Forget the last hand, e.g. after the camera was paused."""
+        self.roi = None
+        self.hands_found = 0
+
+    def summary(self):
+        return f"ROI frames: {self.crop_frames}, full frames: {self.full_frames}, fallbacks: {self.fallbacks}"
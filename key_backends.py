@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger("gesture.keys")
+
+# Key names follow pyautogui (and KEY_TRANSLATION_MAP), backends translate from there
+XTEST_KEYSYMS = {
+    'ctrl': 'Control_L', 'shift': 'Shift_L', 'alt': 'Alt_L',
+    'winleft': 'Super_L', 'winright': 'Super_R',
+    'enter': 'Return', 'space': 'space', 'tab': 'Tab', 'backspace': 'BackSpace',
+    'delete': 'Delete', 'esc': 'Escape', 'up': 'Up', 'down': 'Down', 'left': 'Left', 'right': 'Right',
+    'capslock': 'Caps_Lock', 'pageup': 'Prior', 'pagedown': 'Next', 'home': 'Home', 'end': 'End',
+    'insert': 'Insert', 'numlock': 'Num_Lock', 'printscreen': 'Print', 'pause': 'Pause',
+    **{f'f{i}': f'F{i}' for i in range(1, 13)},
+}
+
+UINPUT_KEYS = {
+    'ctrl': 'KEY_LEFTCTRL', 'shift': 'KEY_LEFTSHIFT', 'alt': 'KEY_LEFTALT',
+    'winleft': 'KEY_LEFTMETA', 'winright': 'KEY_RIGHTMETA',
+    'enter': 'KEY_ENTER', 'space': 'KEY_SPACE', 'tab': 'KEY_TAB', 'backspace': 'KEY_BACKSPACE',
+    'delete': 'KEY_DELETE', 'esc': 'KEY_ESC', 'up': 'KEY_UP', 'down': 'KEY_DOWN', 'left': 'KEY_LEFT',
+    'right': 'KEY_RIGHT', 'capslock': 'KEY_CAPSLOCK', 'pageup': 'KEY_PAGEUP', 'pagedown': 'KEY_PAGEDOWN',
+    'home': 'KEY_HOME', 'end': 'KEY_END', 'insert': 'KEY_INSERT', 'numlock': 'KEY_NUMLOCK',
+    'printscreen': 'KEY_SYSRQ', 'pause': 'KEY_PAUSE',
+    **{f'f{i}': f'KEY_F{i}' for i in range(1, 13)},
+    **{chr(c): f'KEY_{chr(c).upper()}' for c in range(ord('a'), ord('z') + 1)},
+    **{str(i): f'KEY_{i}' for i in range(10)},
+    # Punctuation by the Tk keysym names the mapping UI stores, and by character
+    **{name: code for names, code in (
+        (('semicolon', ';'), 'KEY_SEMICOLON'), (('comma', ','), 'KEY_COMMA'), (('period', '.'), 'KEY_DOT'),
+        (('slash', '/'), 'KEY_SLASH'), (('minus', '-'), 'KEY_MINUS'), (('equal', '='), 'KEY_EQUAL'),
+        (('apostrophe', "'"), 'KEY_APOSTROPHE'), (('bracketleft', '['), 'KEY_LEFTBRACE'),
+        (('bracketright', ']'), 'KEY_RIGHTBRACE'), (('backslash', '\\'), 'KEY_BACKSLASH'),
+        (('grave', '`'), 'KEY_GRAVE'),
+    ) for name in names},
+}
+
+
+class KeyBackend:
+    """Output interface used by the action dispatcher.
+
+    Subclasses implement key_down/key_up and may batch events until
+    flush(); press() and hotkey() are built on top of them. supports()
+    tells, without opening the backend, whether it can send a key.
+    """
+
+    name = None
+
+    @classmethod
+    def supports(cls, key):
+        return True
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def press(self, key):
+        self.key_down(key)
+        self.key_up(key)
+        self.flush()
+
+    def hotkey(self, keys, interval=0.0):
+        """Hold keys down in order and release them in reverse, like pyautogui.hotkey.
+
+        If a key fails, the keys already held are still released before the
+        error propagates, so no modifier is left down.
+        """
+        held = []
+        try:
+            for key in keys:
+                self.key_down(key)
+                held.append(key)
+                if interval:
+                    self.flush()
+                    time.sleep(interval)
+        finally:
+            for key in reversed(held):
+                try:
+                    self.key_up(key)
+                except Exception:
+                    logger.exception("Could not release key '%s'", key)
+                if interval:
+                    self.flush()
+                    time.sleep(interval)
+            self.flush()
+
+    def close(self):
+        pass
+
+
+class PyAutoGuiBackend(KeyBackend):
+    """pyautogui without its fixed PAUSE after every call."""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    @classmethod
+    def supports(cls, key):
+        try:
+            import pyautogui
+        except Exception:  # no display to check against, leave it to injection
+            return True
+        return key in pyautogui.KEYBOARD_KEYS
+
+    def key_down(self, key):
+        self.pyautogui.keyDown(key, _pause=False)
+
+    def key_up(self, key):
+        self.pyautogui.keyUp(key, _pause=False)
+
+
+class XTestBackend(KeyBackend):
+    """X11 XTEST over one persistent display connection, one round trip per action."""
+
+    name = "xtest"
+
+    def __init__(self, display=None):
+        from Xlib import XK, X
+        from Xlib.display import Display
+        from Xlib.ext import xtest
+        self.XK = XK
+        self.X = X
+        self.xtest = xtest
+        self.display = Display(display)
+        self.keycodes = {}
+
+    @classmethod
+    def supports(cls, key):
+        try:
+            from Xlib import XK
+        except ImportError:
+            return True
+        # Whether the keysym also has a keycode depends on the display's keyboard map
+        return XK.string_to_keysym(XTEST_KEYSYMS.get(key, key)) != XK.NoSymbol
+
+    def _keycode(self, key):
+        keycode = self.keycodes.get(key)
+        if keycode is None:
+            keysym = self.XK.string_to_keysym(XTEST_KEYSYMS.get(key, key))
+            keycode = self.display.keysym_to_keycode(keysym)
+            if not keycode:
+                raise ValueError(f"No keycode for key '{key}'")
+            self.keycodes[key] = keycode
+        return keycode
+
+    def key_down(self, key):
+        self.xtest.fake_input(self.display, self.X.KeyPress, self._keycode(key))
+
+    def key_up(self, key):
+        self.xtest.fake_input(self.display, self.X.KeyRelease, self._keycode(key))
+
+    def flush(self):
+        self.display.sync()
+
+    def close(self):
+        self.display.close()
+
+
+class UinputBackend(KeyBackend):
+    """Linux uinput virtual keyboard through python-evdev; works under Wayland and on the console."""
+
+    name = "uinput"
+
+    def __init__(self):
+        from evdev import UInput, ecodes
+        self.ecodes = ecodes
+        codes = [getattr(ecodes, name) for name in UINPUT_KEYS.values()]
+        self.device = UInput({ecodes.EV_KEY: codes}, name="gesture-shortcuts")
+
+    @classmethod
+    def supports(cls, key):
+        return key in UINPUT_KEYS
+
+    def _code(self, key):
+        name = UINPUT_KEYS.get(key)
+        if name is None:
+            raise ValueError(f"Key '{key}' is not supported by the uinput backend")
+        return getattr(self.ecodes, name)
+
+    def key_down(self, key):
+        self.device.write(self.ecodes.EV_KEY, self._code(key), 1)
+
+    def key_up(self, key):
+        self.device.write(self.ecodes.EV_KEY, self._code(key), 0)
+
+    def flush(self):
+        self.device.syn()
+
+    def close(self):
+        self.device.close()
+
+
+class MockBackend(KeyBackend):
+    """Records (timestamp, key, is_down) events in memory instead of injecting them."""
+
+    name = "mock"
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def key_down(self, key):
+        with self.lock:
+            self.events.append((time.perf_counter(), key, True))
+
+    def key_up(self, key):
+        with self.lock:
+            self.events.append((time.perf_counter(), key, False))
+
+
+BACKENDS = {backend.name: backend for backend in (PyAutoGuiBackend, XTestBackend, UinputBackend, MockBackend)}
+
+
+def create_backend(name="pyautogui"):
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown key backend '{name}', expected one of {', '.join(BACKENDS)}") from None
+    return backend()
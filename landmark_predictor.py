@@ -0,0 +1,100 @@
+import numpy as np
+
+from landmarks import HandFeatures
+
+# Inference runs at least every MAX_STRIDE frames
+MAX_STRIDE = 4
+# Fastest landmark speed, in hand sizes per second, up to which inference runs only every max_stride frames
+SLOW_SPEED = 0.5
+# Speed from which inference runs on every frame
+FAST_SPEED = 4.0
+# Weight of the newest finite difference in the smoothed velocity
+VELOCITY_SMOOTHING = 0.6
+# Seconds a prediction may extrapolate, so a stalled camera does not fling the hand off screen
+MAX_HORIZON = 0.2
+
+
+class _Track:
+    __slots__ = ("position", "velocity", "time")
+
+    def __init__(self, position, velocity, time):
+        self.position = position
+        self.velocity = velocity
+        self.time = time
+
+
+class LandmarkPredictor:
+    """Predicts landmarks on the frames between inferences with a constant-velocity model.
+
+    Every landmark of a hand keeps a velocity, an exponential average of
+    the finite differences between inferred frames, updated for all 21 in
+    one array operation. correct() takes the hands of an inferred frame and
+    predict() extrapolates them to a later time. The stride, frames from one
+    inference to the next, follows the fastest landmark: max_stride while
+    the hands are still, every frame once one moves at fast_speed hand
+    sizes per second. A hand seen for the first time has no velocity yet,
+    so the next frame is inferred as well. With no hand in view inference
+    runs every max_stride frames, which bounds how late a new hand is found.
+    """
+
+    def __init__(self, max_stride=MAX_STRIDE, slow_speed=SLOW_SPEED, fast_speed=FAST_SPEED,
+                 smoothing=VELOCITY_SMOOTHING, scale_method="max"):
+        self.max_stride = max_stride
+        self.slow_speed = slow_speed
+        self.fast_speed = fast_speed
+        self.smoothing = smoothing
+        self.scale_method = scale_method
+        self.tracks = {}
+        self.stride = 1
+        self.skipped = 0
+
+    def should_infer(self):
+        return self.skipped >= self.stride - 1
+
+    def correct(self, hand_features, now):
+        """Update the tracks with the hands found on an inferred frame, keyed by their handedness."""
+        tracks = {}
+        speed = 0.0
+        new_hand = False
+        for features in hand_features:
+            track = self.tracks.get(features.handedness)
+            if track is None or now <= track.time:
+                velocity = np.zeros_like(features.raw)
+                new_hand = True
+            else:
+                velocity = track.velocity + self.smoothing * (
+                    (features.raw - track.position) / (now - track.time) - track.velocity)
+                hand_speed = float(np.sqrt((velocity[:, :2] ** 2).sum(axis=1)).max()) / max(features.scale, 1e-6)
+                speed = max(speed, hand_speed)
+            tracks[features.handedness] = _Track(features.raw.copy(), velocity, now)
+        self.tracks = tracks
+        self.skipped = 0
+        if new_hand:
+            self.stride = 1
+        elif not hand_features:
+            self.stride = self.max_stride
+        else:
+            self.stride = self._stride(speed)
+
+    def _stride(self, speed):
+        if speed >= self.fast_speed:
+            return 1
+        if speed <= self.slow_speed:
+            return self.max_stride
+        slowness = (self.fast_speed - speed) / (self.fast_speed - self.slow_speed)
+        return 1 + int(round(slowness * (self.max_stride - 1)))
+
+    def predict(self, now):
+        """HandFeatures of every tracked hand extrapolated to now, counted as a skipped frame."""
+        self.skipped += 1
+        if not self.tracks:
+            return []
+        labels = list(self.tracks)
+        raws = np.stack([track.position + track.velocity * min(now - track.time, MAX_HORIZON)
+                         for track in self.tracks.values()])
+        return HandFeatures.batch(raws, self.scale_method, labels)
+
+    def reset(self):
+        self.tracks = {}
+        self.stride = 1
+        self.skipped = 0
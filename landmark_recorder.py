@@ -0,0 +1,136 @@
+import json
+import os
+import time
+
+import numpy as np
+
+META_FILE = "meta.json"
+HANDEDNESS = ("Left", "Right")
+# name -> (dtype, per-frame shape); each column is one raw file of capacity rows
+COLUMNS = {
+    "timestamps": ("<f8", ()),
+    "present": ("|b1", ()),
+    "handedness": ("|i1", ()),
+    "landmarks": ("<f4", (21, 3)),
+    "gesture": ("<i4", ()),
+}
+# Seconds between rewrites of meta.json, which bounds the frames a crash can lose from it
+META_INTERVAL = 1.0
+
+
+def _column_path(path, name):
+    return os.path.join(path, name + ".bin")
+
+
+class LandmarkRecorder:
+    """Appends one row per frame to a directory of memory-mapped column files.
+
+    Columns are timestamps (seconds), present (a hand was seen), handedness
+    (0 left, 1 right, -1 unknown), landmarks (21, 3) float32 and gesture (an
+    index into the gesture id list in meta.json, -1 for none). The files are
+    preallocated and grown chunk_frames rows at a time, so append() is a few
+    slice assignments. meta.json records the row count and is rewritten on
+    every growth, every meta_interval seconds, when a new gesture id is
+    first recorded and on close(), so a recording cut short by a crash keeps
+    all but its last second; open_recording() recovers those frames as well.
+    A new recording replaces whatever the directory held.
+    """
+
+    def __init__(self, path, chunk_frames=4096, meta_interval=META_INTERVAL):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.meta_interval = meta_interval
+        self.frames = 0
+        self.capacity = 0
+        self.columns = {}
+        self.gesture_ids = {}
+        self.append_seconds = 0.0
+        self.meta_written = 0.0
+        for name in COLUMNS:
+            # Rows left over from an earlier recording would be taken for recovered frames
+            with open(_column_path(path, name), "wb"):
+                pass
+        self._grow()
+
+    def _grow(self):
+        self.capacity += self.chunk_frames
+        for name, (dtype, shape) in COLUMNS.items():
+            old = self.columns.pop(name, None)
+            if old is not None:
+                old.flush()
+                del old
+            column_path = _column_path(self.path, name)
+            size = self.capacity * np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+            with open(column_path, "ab") as f:
+                f.truncate(size)
+            self.columns[name] = np.memmap(column_path, dtype=dtype, mode="r+", shape=(self.capacity,) + shape)
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            "frames": self.frames,
+            "capacity": self.capacity,
+            "columns": {name: {"dtype": dtype, "shape": list(shape)} for name, (dtype, shape) in COLUMNS.items()},
+            "gestures": sorted(self.gesture_ids, key=self.gesture_ids.get),
+        }
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f)
+        self.meta_written = time.perf_counter()
+
+    def append(self, timestamp, landmarks=None, handedness=None, gesture=None):
+        started = time.perf_counter()
+        if self.frames == self.capacity:
+            self._grow()
+        row = self.frames
+        columns = self.columns
+        columns["timestamps"][row] = timestamp
+        columns["present"][row] = landmarks is not None
+        columns["handedness"][row] = HANDEDNESS.index(handedness) if handedness in HANDEDNESS else -1
+        if landmarks is not None:
+            columns["landmarks"][row] = landmarks
+        if gesture is None:
+            columns["gesture"][row] = -1
+        else:
+            code = self.gesture_ids.get(gesture)
+            if code is None:
+                code = self.gesture_ids[gesture] = len(self.gesture_ids)
+                # Forces a rewrite below, so meta.json always lists the ids the column refers to
+                self.meta_written = 0.0
+            columns["gesture"][row] = code
+        self.frames += 1
+        if started - self.meta_written >= self.meta_interval:
+            self._write_meta()
+        self.append_seconds += time.perf_counter() - started
+
+    def summary(self):
+        mean_us = self.append_seconds / self.frames * 1e6 if self.frames else 0.0
+        return f"Recorded {self.frames} frames to {self.path}, {mean_us:.1f} us per frame"
+
+    def close(self):
+        for column in self.columns.values():
+            column.flush()
+        self._write_meta()
+        self.columns = {}
+
+
+def open_recording(path):
+    """Map a recording read-only without copying.
+
+    Returns (columns, gestures): a dict of arrays trimmed to the recorded
+    frames, backed by numpy.memmap, and the list of gesture ids the
+    gesture column indexes into. When the recorder did not close, rows
+    written after meta.json last was are recovered from their timestamps,
+    as the unused rows are still zero.
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    columns = {}
+    for name, spec in meta["columns"].items():
+        shape = (meta["capacity"],) + tuple(spec["shape"])
+        columns[name] = np.memmap(_column_path(path, name), dtype=spec["dtype"], mode="r", shape=shape)
+    frames = meta["frames"]
+    written = np.flatnonzero(columns["timestamps"][frames:])
+    if len(written):
+        frames += int(written[-1]) + 1
+    return {name: column[:frames] for name, column in columns.items()}, meta["gestures"]
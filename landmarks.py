@@ -0,0 +1,152 @@
+import numpy as np
+
+WRIST = 0
+MIDDLE_FINGER_MCP = 9
+
+
+def handedness_label(handedness):
+    """'Left' or 'Right' from a MediaPipe handedness classification, None without one."""
+    return handedness.classification[0].label if handedness is not None else None
+
+
+def landmarks_to_array(hand_landmarks):
+    """Convert a MediaPipe landmark list to a (21, 3) float32 array."""
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+
+
+def hands_from_results(multi_hand_landmarks, multi_handedness, scale_method="max"):
+    """HandFeatures for every hand MediaPipe found, built in one batch."""
+    if not multi_hand_landmarks:
+        return []
+    raws = np.stack([landmarks_to_array(hand_landmarks) for hand_landmarks in multi_hand_landmarks])
+    labels = [handedness_label(handedness) for handedness in multi_handedness or []]
+    return HandFeatures.batch(raws, scale_method, labels + [None] * (len(raws) - len(labels)))
+
+
+def hand_scale(centered, method="max"):
+    """Scale of a wrist-centered (21, 3) array.
+
+    "max" is the largest distance between any two landmarks, "bone" is the
+    wrist to middle-finger MCP length, which is much cheaper but not
+    interchangeable with templates normalized by "max".
+    """
+    if method == "bone":
+        return float(np.sqrt(np.dot(centered[MIDDLE_FINGER_MCP], centered[MIDDLE_FINGER_MCP])))
+    diffs = centered[:, None, :] - centered[None, :, :]
+    return float(np.sqrt(np.einsum("ijk,ijk->ij", diffs, diffs).max()))
+
+
+def hand_scales(centered, method="max"):
+    """hand_scale of every hand in a wrist-centered (H, 21, 3) stack, as an (H,) array."""
+    if method == "bone":
+        return np.sqrt(np.einsum("hk,hk->h", centered[:, MIDDLE_FINGER_MCP], centered[:, MIDDLE_FINGER_MCP]))
+    diffs = centered[:, :, None, :] - centered[:, None, :, :]
+    return np.sqrt(np.einsum("hijk,hijk->hij", diffs, diffs).max(axis=(1, 2)))
+
+
+def normalize_landmark_array(coords, method="max"):
+    """Translate a (21, 3) array to the wrist and divide it by the hand scale."""
+    coords = np.asarray(coords, dtype=np.float32)
+    centered = coords - coords[WRIST]
+    scale = hand_scale(centered, method)
+    if scale > 0:
+        centered /= scale
+    return centered
+
+
+THUMB_MCP = 2
+THUMB_IP = 3
+THUMB_TIP = 4
+INDEX_FINGER_MCP = 5
+PINKY_MCP = 17
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+FINGER_BITS = 1 << np.arange(1, 5)
+# Extended fingers other than the thumb for each 5-bit finger code
+FINGER_COUNTS = tuple(bin(code >> 1).count("1") for code in range(32))
+
+
+def _distance_2d(a, b):
+    d = a[:2] - b[:2]
+    return float(np.sqrt(d @ d))
+
+
+def thumb_extended(raw):
+    """Whether the thumb sticks out of the hand.
+
+    Compares distances within the hand rather than raw x positions, so it
+    works for either hand and any roll: an extended thumb tip is further
+    from the pinky knuckle than its own IP joint is, and further from the
+    index knuckle than the thumb's MCP joint is. A thumb folded across the
+    palm fails at least one of the two.
+    """
+    tip = raw[THUMB_TIP]
+    return (_distance_2d(tip, raw[PINKY_MCP]) > _distance_2d(raw[THUMB_IP], raw[PINKY_MCP])
+            and _distance_2d(tip, raw[INDEX_FINGER_MCP]) > _distance_2d(raw[THUMB_MCP], raw[INDEX_FINGER_MCP]))
+
+
+def thumbs_extended(raws):
+    """thumb_extended for every hand of an (H, 21, 3) stack, as an (H,) bool array."""
+    def distances(a, b):
+        d = raws[:, a, :2] - raws[:, b, :2]
+        return np.sqrt(np.einsum("hk,hk->h", d, d))
+
+    return ((distances(THUMB_TIP, PINKY_MCP) > distances(THUMB_IP, PINKY_MCP))
+            & (distances(THUMB_TIP, INDEX_FINGER_MCP) > distances(THUMB_MCP, INDEX_FINGER_MCP)))
+
+
+class HandFeatures:
+    """Everything the classifiers and the overlay need from one hand, computed once per frame.
+
+    raw is the (21, 3) float32 landmark array in normalized image
+    coordinates, normalized is the wrist-centered array divided by scale,
+    and finger_code has bit 0 set for an extended thumb and bits 1-4 for
+    the index, middle, ring and pinky fingers. handedness is 'Left',
+    'Right' or None when the source does not report it.
+    """
+
+    __slots__ = ("raw", "normalized", "scale", "finger_code", "handedness")
+
+    def __init__(self, raw, scale_method="max", handedness=None):
+        self.raw = raw
+        self.handedness = handedness
+        centered = raw - raw[WRIST]
+        self.scale = hand_scale(centered, scale_method)
+        if self.scale > 0:
+            centered /= self.scale
+        self.normalized = centered
+        # Image y grows downwards, so an extended finger has its tip above its PIP joint
+        extended = raw[FINGER_TIPS, 1] < raw[FINGER_PIPS, 1]
+        self.finger_code = int(extended @ FINGER_BITS) | int(thumb_extended(raw))
+
+    @classmethod
+    def from_landmarks(cls, hand_landmarks, scale_method="max", handedness=None):
+        return cls(landmarks_to_array(hand_landmarks), scale_method, handedness)
+
+    @classmethod
+    def batch(cls, raws, scale_method="max", handedness=None):
+        """Features of every hand in a frame from one vectorized pass over the (H, 21, 3) stack.
+
+        handedness is a list with one label (or None) per hand. Gives the
+        same values as building each hand on its own.
+        """
+        raws = np.asarray(raws, dtype=np.float32)
+        centered = raws - raws[:, WRIST:WRIST + 1]
+        scales = hand_scales(centered, scale_method)
+        centered /= np.where(scales > 0, scales, 1.0)[:, None, None]
+        extended = raws[:, FINGER_TIPS, 1] < raws[:, FINGER_PIPS, 1]
+        codes = (extended @ FINGER_BITS) | thumbs_extended(raws)
+        hands = []
+        for i in range(len(raws)):
+            features = cls.__new__(cls)
+            features.raw = raws[i]
+            features.normalized = centered[i]
+            features.scale = float(scales[i])
+            features.finger_code = int(codes[i])
+            features.handedness = handedness[i] if handedness else None
+            hands.append(features)
+        return hands
+
+    @property
+    def fingers_up(self):
+        return FINGER_COUNTS[self.finger_code]
@@ -0,0 +1,156 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("gesture.metrics")
+
+# Upper bucket bounds in milliseconds, the last bucket is everything above
+BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+COUNTERS = ("frames", "detections", "triggers", "cooldown_suppressed", "frames_dropped", "actions_dropped",
+            "frames_predicted")
+PREFIX = "gesture_"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and two additions."""
+
+    __slots__ = ("counts", "sum_ms", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.sum_ms = 0.0
+        self.count = 0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.sum_ms += ms
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (inf if it is in the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Counters and per-stage latency histograms for the recognition loop.
+
+    Cheap enough to stay on: the loop bumps counters with count() and
+    feeds stage times (ms) with observe(). Values that other objects
+    already count, such as frames dropped by the grabber, are registered
+    with track() and only read when a snapshot is taken.
+    """
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.histograms = {}
+        self.tracked = {}
+        self.started = time.time()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def observe(self, stage, ms):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(ms)
+
+    def track(self, name, fn):
+        self.tracked[name] = fn
+
+    def current_counters(self):
+        counters = dict(self.counters)
+        for name, fn in self.tracked.items():
+            counters[name] = fn()
+        return counters
+
+    def snapshot(self):
+        """Counters plus count, mean, p50 and p95 per stage, for the JSON log line."""
+        stages = {}
+        for stage, histogram in list(self.histograms.items()):
+            if histogram.count:
+                stages[stage] = {
+                    "count": histogram.count,
+                    "mean_ms": round(histogram.sum_ms / histogram.count, 3),
+                    "p50_ms": histogram.quantile(0.5),
+                    "p95_ms": histogram.quantile(0.95),
+                }
+        return {"uptime_s": round(time.time() - self.started, 1), "counters": self.current_counters(),
+                "stages": stages}
+
+    def prometheus(self):
+        lines = []
+        for name, value in self.current_counters().items():
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            lines.append(f"{PREFIX}{name}_total {value}")
+        metric = f"{PREFIX}stage_latency_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for stage, histogram in list(self.histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS, histogram.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum_ms / 1000:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves Metrics in the Prometheus text format at http://host:port/metrics from a daemon thread."""
+
+    def __init__(self, metrics, port=9464, host="127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+        self.thread.start()
+        logger.info("Serving metrics on http://%s:%d/metrics", host, self.server.server_address[1])
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsLogger:
+    """Logs a Metrics snapshot as one JSON line every interval seconds."""
+
+    def __init__(self, metrics, interval=60.0):
+        self.metrics = metrics
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="metrics-logger", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            logger.info(json.dumps(self.metrics.snapshot()))
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join(timeout=1.0)
+        logger.info(json.dumps(self.metrics.snapshot()))
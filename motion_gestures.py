@@ -0,0 +1,216 @@
+import functools
+
+import numpy as np
+
+# Samples in a motion window; recordings and the live window are both resampled to it
+MOTION_FRAMES = 24
+# Duration of a motion window, whatever the frame rate and however many frames were skipped
+MOTION_SECONDS = 0.8
+# Frames buffered per hand, enough to cover MOTION_SECONDS up to 120 fps
+MOTION_BUFFER = 4 * MOTION_FRAMES
+# Sakoe-Chiba band: frame i of the window may only align with template frames i +/- MOTION_BAND
+MOTION_BAND = 4
+# A full window is matched every MOTION_STRIDE frames, which bounds the per-frame cost
+MOTION_STRIDE = 3
+# Mean point distance per frame along the warping path, in hand sizes
+MOTION_THRESHOLD = 0.4
+# Wrist travel (hand sizes) below which the window is not matched at all
+MIN_TRAVEL = 1.0
+# Wrist and the five fingertips
+TRACKED_LANDMARKS = np.array([0, 4, 8, 12, 16, 20])
+
+
+def is_motion_gesture(g_data):
+    """Custom gestures recorded as a motion carry a 'trajectory' instead of 'landmarks'."""
+    return 'trajectory' in g_data
+
+
+def motion_templates(g_data):
+    """All stored trajectories of one motion gesture: its first recording plus any extra ones."""
+    return [g_data['trajectory']] + g_data.get('extra_trajectories', [])
+
+
+def hand_points(raw):
+    """(6, 2) image positions of the tracked landmarks and the hand size (wrist to middle finger base)."""
+    return raw[TRACKED_LANDMARKS, :2], float(np.hypot(*(raw[9, :2] - raw[0, :2])))
+
+
+def normalize_trajectory(points, sizes):
+    """(L, 6, 2) points and (L,) hand sizes to an (L, 12) trajectory centered on the mean wrist position, in hand sizes."""
+    scale = max(float(np.median(sizes)), 1e-6)
+    centered = points - points[:, 0].mean(axis=0)
+    return (centered / scale).reshape(len(points), -1).astype(np.float32)
+
+
+def resample_by_time(times, points, sizes, start, end, length=MOTION_FRAMES):
+    """(L, 6, 2) points and (L,) sizes taken at times, interpolated at length evenly spaced times from start to end."""
+    target = np.linspace(start, end, length)
+    flat = points.reshape(len(points), -1)
+    resampled = np.stack([np.interp(target, times, column) for column in flat.T], axis=1)
+    return (resampled.reshape(length, *points.shape[1:]).astype(np.float32),
+            np.interp(target, times, sizes).astype(np.float32))
+
+
+def trajectory_from_hands(raws, times=None):
+    """Normalized trajectory of a list of raw (21, 3) hands, as stored for a motion template.
+
+    With times, the hands are first resampled to MOTION_FRAMES evenly
+    spaced over the time they cover, as the live window is.
+    """
+    points, sizes = zip(*(hand_points(raw) for raw in raws))
+    points, sizes = np.array(points), np.array(sizes)
+    if times is not None:
+        points, sizes = resample_by_time(np.asarray(times, dtype=np.float64), points, sizes, times[0], times[-1])
+    return normalize_trajectory(points, sizes)
+
+
+def resample_trajectory(trajectory, length):
+    trajectory = np.asarray(trajectory, dtype=np.float32)
+    if len(trajectory) == length:
+        return trajectory
+    source = np.linspace(0.0, 1.0, len(trajectory))
+    target = np.linspace(0.0, 1.0, length)
+    return np.stack([np.interp(target, source, column) for column in trajectory.T], axis=1).astype(np.float32)
+
+
+@functools.lru_cache(maxsize=None)
+def _band(length, band):
+    """Banded cells as 0-based (rows, cols) arrays and, per anti-diagonal k = i + j, the 1-based rows on it."""
+    rows, cols = np.nonzero(np.abs(np.subtract.outer(np.arange(length), np.arange(length))) <= band)
+    diagonals = []
+    for k in range(2, 2 * length + 1):
+        lo = max(1, k - length, (k - band + 1) // 2)
+        hi = min(length, k - 1, (k + band) // 2)
+        if lo <= hi:
+            diagonals.append((k, lo, hi + 1))
+    return rows, cols, tuple(diagonals)
+
+
+def banded_dtw(templates, query, band=MOTION_BAND):
+    """DTW distance from an (L, D) query to each of (N, L, D) templates, within a Sakoe-Chiba band.
+
+    Frame costs are only computed for cells inside the band. The table is
+    stored skewed, indexed by anti-diagonal and row: a cell only depends
+    on the two diagonals before it, so the recurrence is 2L slice
+    operations over all templates at once whatever the library size.
+    Returns (N,) path costs divided by L.
+    """
+    count, length = templates.shape[:2]
+    rows, cols, diagonals = _band(length, band)
+    # Frame cost is the mean distance between matching tracked points, like the pose matcher's
+    diffs = (templates[:, rows] - query[cols]).reshape(count, len(rows), -1, 2)
+    cost = np.full((count, 2 * length + 1, length + 1), np.inf, dtype=np.float32)
+    cost[:, rows + cols + 2, rows + 1] = np.sqrt(np.einsum("ncpd,ncpd->ncp", diffs, diffs)).mean(axis=2)
+    # table[:, k, i] is the best path cost to cell (i, k - i); row and column 0 are inf except the origin
+    table = np.full_like(cost, np.inf)
+    table[:, 0, 0] = 0.0
+    for k, lo, hi in diagonals:
+        best = np.minimum(np.minimum(table[:, k - 1, lo - 1:hi - 1], table[:, k - 1, lo:hi]),
+                          table[:, k - 2, lo - 1:hi - 1])
+        table[:, k, lo:hi] = cost[:, k, lo:hi] + best
+    return table[:, 2 * length, length] / length
+
+
+class MotionTemplates:
+    """Motion gesture trajectories compiled into one (N, MOTION_FRAMES, 12) array.
+
+    Like TemplateMatrix it is immutable once built and swapped in whole
+    when the gesture library changes.
+    """
+
+    def __init__(self, custom_gestures, frames=MOTION_FRAMES):
+        self.frames = frames
+        self.names = tuple(sorted(name for name, g_data in custom_gestures.items() if is_motion_gesture(g_data)))
+        rows = []
+        label_ids = []
+        for i, g_name in enumerate(self.names):
+            for trajectory in motion_templates(custom_gestures[g_name]):
+                rows.append(resample_trajectory(trajectory, frames))
+                label_ids.append(i)
+        self.templates = np.array(rows, dtype=np.float32).reshape(len(rows), frames, 2 * len(TRACKED_LANDMARKS))
+        self.label_ids = np.array(label_ids, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.templates)
+
+    def match(self, trajectory, threshold=MOTION_THRESHOLD):
+        """Return (name, distance) of the closest template, or (None, inf) when none is within threshold."""
+        if not len(self.templates):
+            return None, float('inf')
+        distances = banded_dtw(self.templates, trajectory)
+        best = int(np.argmin(distances))
+        if distances[best] >= threshold:
+            return None, float(distances[best])
+        return self.names[self.label_ids[best]], float(distances[best])
+
+
+class MotionTracker:
+    """Ring buffer of one hand's recent wrist and fingertip positions and their times.
+
+    update() stores a frame in O(1). Every stride frames, once the buffer
+    reaches back seconds, the window is resampled to frames samples evenly
+    spaced over the last seconds, so it covers the same duration as a
+    recorded template at any frame rate or inference stride. It is only
+    matched against the templates when the wrist has travelled far enough.
+    After a match the buffer is cleared, so one movement fires once and
+    the next needs a full new window.
+    """
+
+    def __init__(self, frames=MOTION_FRAMES, seconds=MOTION_SECONDS, stride=MOTION_STRIDE, capacity=MOTION_BUFFER):
+        self.frames = frames
+        self.seconds = seconds
+        self.stride = stride
+        self.capacity = capacity
+        self.points = np.zeros((capacity, len(TRACKED_LANDMARKS), 2), dtype=np.float32)
+        self.sizes = np.zeros(capacity, dtype=np.float32)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+        self.head = 0
+
+    def push(self, raw, now):
+        self.points[self.head], self.sizes[self.head] = hand_points(raw)
+        self.times[self.head] = now
+        self.head = (self.head + 1) % self.capacity
+        self.count += 1
+
+    def window(self, now):
+        """(frames, 6, 2) points and (frames,) sizes over the last seconds, None until the buffer covers them."""
+        buffered = min(self.count, self.capacity)
+        order = (self.head - buffered + np.arange(buffered)) % self.capacity
+        times = self.times[order]
+        start = now - self.seconds
+        if not buffered or times[0] > start:
+            return None
+        # Only the last frame before the window is needed to interpolate its start
+        first = int(np.searchsorted(times, start, side="right")) - 1
+        order = order[first:]
+        return resample_by_time(times[first:], self.points[order], self.sizes[order], start, now, self.frames)
+
+    def trajectory(self, now):
+        """The window over the last seconds, normalized, or None until the buffer covers them."""
+        window = self.window(now)
+        return normalize_trajectory(*window) if window is not None else None
+
+    def update(self, raw, templates, now):
+        self.push(raw, now)
+        if not len(templates) or self.count % self.stride:
+            return None
+        window = self.window(now)
+        if window is None:
+            return None
+        points, sizes = window
+        scale = max(float(np.median(sizes)), 1e-6)
+        if np.ptp(points[:, 0], axis=0).max() / scale < MIN_TRAVEL:
+            return None
+        name, _ = templates.match(normalize_trajectory(points, sizes))
+        if name is not None:
+            self.reset()
+        return name
+
+    def reset(self):
+        self.count = 0
+        self.head = 0
+
+
+def compile_motion_templates(custom_gestures):
+    return MotionTemplates(custom_gestures)
@@ -0,0 +1,62 @@
+import time
+
+import cv2
+import numpy as np
+
+# Same topology as mediapipe.solutions.hands.HAND_CONNECTIONS
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+_CONNECTION_INDEX = np.array(HAND_CONNECTIONS)
+
+
+def draw_hand(frame, features, landmark_color=(0, 255, 0), connection_color=(0, 0, 255)):
+    """Draw the hand skeleton from a HandFeatures' raw landmark array."""
+    height, width = frame.shape[:2]
+    points = (features.raw[:, :2] * (width, height)).astype(np.int32)
+    cv2.polylines(frame, list(points[_CONNECTION_INDEX]), False, connection_color, 2)
+    for x, y in points.tolist():
+        cv2.circle(frame, (x, y), 3, landmark_color, 2)
+
+
+class OverlayRenderer:
+    """Preview window refreshed at most fps times a second.
+
+    Text styles are fixed when the renderer is built. Frames that arrive
+    between refreshes are neither drawn nor shown, and the HighGUI event
+    loop (and with it the keyboard) is only polled on refreshes.
+    """
+
+    def __init__(self, window_name="Hand Tracking", fps=15.0, color=(255, 255, 0)):
+        self.window_name = window_name
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.next_refresh = 0.0
+        self.title_style = (cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+        self.status_style = (cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 1)
+        self.frames_shown = 0
+
+    def render(self, frame, hand_features, gesture_text="", status="", instruction=""):
+        """Draw and show the frame if a refresh is due; returns the key pressed, or None when skipped."""
+        now = time.perf_counter()
+        if now < self.next_refresh:
+            return None
+        self.next_refresh = now + self.interval
+        for features in hand_features:
+            draw_hand(frame, features)
+        if status:
+            cv2.putText(frame, status, (10, 400), *self.status_style)
+        if gesture_text:
+            cv2.putText(frame, gesture_text, (frame.shape[1] - 300, 50), *self.title_style)
+        if instruction:
+            cv2.putText(frame, instruction, (10, 450), *self.title_style)
+        cv2.imshow(self.window_name, frame)
+        self.frames_shown += 1
+        return cv2.waitKey(1) & 0xFF
+
+    def close(self):
+        if self.frames_shown:
+            cv2.destroyWindow(self.window_name)
@@ -0,0 +1,227 @@
+import multiprocessing as mproc
+from multiprocessing import shared_memory
+import queue
+import time
+
+import cv2
+import numpy as np
+
+from hand_roi import HandRoiTracker
+from landmarks import handedness_label, landmarks_to_array
+
+# Seconds read() waits for a result by default before raising queue.Empty
+READ_TIMEOUT = 5.0
+
+
+def _attach(shm_names, shape):
+    shms = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    views = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf) for shm in shms]
+    return shms, views
+
+
+def _capture_worker(device, shm_names, shape, free_q, frame_q, stop_event, run_event):
+    shms, views = _attach(shm_names, shape)
+    cap = cv2.VideoCapture(device)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, shape[1])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, shape[0])
+    dropped = 0
+    try:
+        while not stop_event.is_set():
+            if not run_event.is_set():
+                run_event.wait(0.1)
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            try:
+                slot = free_q.get_nowait()
+            except queue.Empty:
+                # Downstream is still busy with every slot, so this frame is already stale
+                dropped += 1
+                continue
+            if frame.shape != shape:
+                frame = cv2.resize(frame, (shape[1], shape[0]))
+            cv2.flip(frame, 1, dst=views[slot])
+            frame_q.put((slot, time.time(), dropped))
+    finally:
+        frame_q.put(None)
+        cap.release()
+        del views
+        for shm in shms:
+            shm.close()
+
+
+def _inference_worker(shm_names, shape, frame_q, result_q, use_roi, max_hands):
+    import mediapipe as mp
+
+    shms, views = _attach(shm_names, shape)
+    hands = None
+    try:
+        # Inside the try, so a model that fails to load still ends the stream for the consumer
+        hands = mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=max_hands,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        roi_tracker = HandRoiTracker(hands, max_hands=max_hands) if use_roi else None
+        # A few blank frames initialize the graph before the first real one arrives
+        blank = np.zeros(shape, dtype=np.uint8)
+        for _ in range(3):
+            hands.process(blank)
+        while True:
+            item = frame_q.get()
+            if item is None:
+                break
+            slot, timestamp, dropped = item
+            rgb_frame = cv2.cvtColor(views[slot], cv2.COLOR_BGR2RGB)
+            if roi_tracker:
+                multi_hand_landmarks = roi_tracker.process(rgb_frame)
+                multi_handedness = roi_tracker.multi_handedness
+            else:
+                results = hands.process(rgb_frame)
+                multi_hand_landmarks, multi_handedness = results.multi_hand_landmarks, results.multi_handedness
+            landmarks = None
+            handedness = None
+            if multi_hand_landmarks:
+                landmarks = np.stack([landmarks_to_array(hand_landmarks) for hand_landmarks in multi_hand_landmarks])
+                handedness = [handedness_label(h) for h in multi_handedness or []]
+                handedness += [None] * (len(landmarks) - len(handedness))
+            result_q.put((slot, timestamp, dropped, landmarks, handedness))
+    finally:
+        result_q.put(None)
+        if hands is not None:
+            hands.close()
+        del views
+        for shm in shms:
+            shm.close()
+
+
+def _action_worker(action_q, key_delay, burst_policy, key_backend, actions_dropped):
+    from action_dispatcher import ActionDispatcher
+    from key_backends import create_backend
+
+    dispatcher = ActionDispatcher(inter_key_delay=key_delay, policy=burst_policy,
+                                  backend=create_backend(key_backend))
+    while True:
+        mapping = action_q.get()
+        if mapping is None:
+            break
+        dispatcher.submit(mapping)
+        # drop_oldest drops a queued action while accepting this one, so the count is copied every time
+        actions_dropped.value = dispatcher.dropped
+    dispatcher.close()
+    print(dispatcher.latency_summary())
+
+
+class CapturePipeline:
+    """Runs capture, inference and key injection in separate processes.
+
+    Frames live in a fixed ring of shared memory slots: the capture process
+    writes into a free slot, the inference process reads it in place and
+    forwards the slot index with an (H, 21, 3) array of every hand found
+    (their handedness ends up in the handedness attribute), and the consumer
+    hands the slot back through release_frame() once it is done drawing.
+    """
+
+    def __init__(self, device=0, width=640, height=480, num_slots=4, use_roi=False,
+                 key_delay=0.0, burst_policy="coalesce", key_backend="pyautogui", max_hands=1):
+        self.shape = (height, width, 3)
+        size = height * width * 3
+        self.shms = [shared_memory.SharedMemory(create=True, size=size) for _ in range(num_slots)]
+        self.views = [np.ndarray(self.shape, dtype=np.uint8, buffer=shm.buf) for shm in self.shms]
+        shm_names = [shm.name for shm in self.shms]
+
+        self.free_q = mproc.Queue()
+        for slot in range(num_slots):
+            self.free_q.put(slot)
+        self.frame_q = mproc.Queue()
+        self.result_q = mproc.Queue()
+        self.action_q = mproc.Queue()
+        self.stop_event = mproc.Event()
+        self.run_event = mproc.Event()
+        self.run_event.set()
+        self.frames_dropped = 0
+        # Written only by the action process, whose dispatcher applies the burst policy
+        self.actions_dropped = mproc.Value("l", 0, lock=False)
+        # Handedness of each hand in the last read(), None when unknown
+        self.handedness = None
+        self.finished = False
+
+        self.inference_process = mproc.Process(
+            target=_inference_worker, name="gesture-inference",
+            args=(shm_names, self.shape, self.frame_q, self.result_q, use_roi, max_hands))
+        self.processes = [
+            mproc.Process(target=_capture_worker, name="gesture-capture",
+                          args=(device, shm_names, self.shape, self.free_q, self.frame_q, self.stop_event,
+                                self.run_event)),
+            self.inference_process,
+            mproc.Process(target=_action_worker, name="gesture-action",
+                          args=(self.action_q, key_delay, burst_policy, key_backend, self.actions_dropped)),
+        ]
+        for process in self.processes:
+            process.daemon = True
+            process.start()
+
+    def read(self, timeout=READ_TIMEOUT):
+        """Return (ret, slot, frame, landmarks); frame is a view into shared memory.
+
+        ret is False once the stream has ended, also when the inference
+        process died without saying so. queue.Empty is raised when nothing
+        arrived within timeout while it is still running.
+        """
+        if self.finished:
+            return False, None, None, None
+        try:
+            item = self.result_q.get(timeout=timeout)
+        except queue.Empty:
+            if self.inference_process.is_alive():
+                raise
+            item = None
+        if item is None:
+            self.finished = True
+            return False, None, None, None
+        slot, _, self.frames_dropped, landmarks, self.handedness = item
+        return True, slot, self.views[slot], landmarks
+
+    def release_frame(self, slot):
+        self.free_q.put(slot)
+
+    def send_action(self, mapping):
+        self.action_q.put({'type': mapping['type'], 'keys': mapping['keys']})
+
+    def pause(self):
+        """Stop capturing new frames; the processes, the camera and the model stay up."""
+        self.run_event.clear()
+
+    def resume(self):
+        # Results that were still in flight when the pipeline paused are stale now
+        while not self.finished:
+            try:
+                ret, slot, _, _ = self.read(timeout=0)
+            except queue.Empty:
+                break
+            if ret:
+                self.release_frame(slot)
+        self.run_event.set()
+
+    def close(self):
+        self.stop_event.set()
+        self.run_event.set()
+        # Keep recycling slots so the capture process can reach its sentinel
+        while not self.finished:
+            try:
+                ret, slot, _, _ = self.read(timeout=2.0)
+            except queue.Empty:
+                break
+            if ret:
+                self.release_frame(slot)
+        self.action_q.put(None)
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        del self.views
+        for shm in self.shms:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,233 @@
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+from hand_roi import HandRoiTracker
+from landmarks import HandFeatures, hands_from_results
+from action_dispatcher import ActionDispatcher
+from key_backends import BACKENDS, create_backend
+from metrics import Metrics
+
+logger = logging.getLogger("gesture.session")
+
+
+class CaptureSession:
+    """Camera, hands model and key output shared by every mode of the app.
+
+    Everything is opened on the first resume() and kept until close():
+    leaving a mode pauses the camera instead of releasing the device and
+    reloading the model. With use_pipeline the same holds for the capture
+    pipeline processes. Each switch is timed from pause() to the first
+    frame of the next mode.
+
+    prewarm() does the opening on a background thread while the mapping
+    UI is still up and pushes a few blank frames through the model, so
+    the first real frame does not pay for graph initialization.
+    """
+
+    def __init__(self, device=0, use_pipeline=False, use_roi=False, key_delay=0.0, burst_policy="coalesce",
+                 key_backend="pyautogui", replay=None, speed=1.0, max_hands=1):
+        self.device = device
+        self.max_hands = max_hands
+        self.replay = replay
+        self.speed = speed
+        # Wall time for the camera, recorded time when replaying; set up with the source
+        self.clock = None
+        self.use_pipeline = use_pipeline
+        self.use_roi = use_roi
+        self.key_delay = key_delay
+        self.burst_policy = burst_policy
+        self.key_backend = key_backend
+        self.pipeline = None
+        self.cap = None
+        self.hands = None
+        self.roi_tracker = None
+        self.dispatcher = None
+        self.mode = None
+        self.switch_started = None
+        self.switch_times = []
+        self.created = time.perf_counter()
+        self.capture_started = None
+        self.first_processed = None
+        self.prewarm_thread = None
+        # Outlives the capture loops so counters cover the whole run
+        self.metrics = Metrics()
+
+    @property
+    def opened(self):
+        return self.pipeline is not None or self.cap is not None
+
+    def _open(self):
+        # MediaPipe and OpenCV take seconds to import, so they are loaded here, off the UI's startup path
+        from frame_sources import ReplayClock, open_source
+
+        self.clock = ReplayClock()
+        if self.use_pipeline:
+            from pipeline import CapturePipeline
+
+            # Capture, inference and key injection run in their own processes
+            self.pipeline = CapturePipeline(self.device, use_roi=self.use_roi, key_delay=self.key_delay,
+                                            burst_policy=self.burst_policy, key_backend=self.key_backend,
+                                            max_hands=self.max_hands)
+            self.metrics.track("frames_dropped", lambda: self.pipeline.frames_dropped)
+            self.metrics.track("actions_dropped", lambda: self.pipeline.actions_dropped.value)
+            return
+        self.cap = open_source(self.replay, self.device, self.speed, self.clock)
+        # A landmark recording replays without the model
+        if self.cap.needs_inference:
+            import mediapipe as mp
+
+            self.hands = mp.solutions.hands.Hands(
+                static_image_mode=False,
+                max_num_hands=self.max_hands,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            self.roi_tracker = HandRoiTracker(self.hands, max_hands=self.max_hands) if self.use_roi else None
+        # Keys are injected on a worker thread so a long hotkey never stalls the frame loop
+        self.dispatcher = ActionDispatcher(inter_key_delay=self.key_delay, policy=self.burst_policy,
+                                           backend=create_backend(self.key_backend), metrics=self.metrics)
+        # Recorded sources play every frame and have nothing to drop
+        self.metrics.track("frames_dropped", lambda: getattr(self.cap, "frames_dropped", 0))
+        self.metrics.track("actions_dropped", lambda: self.dispatcher.dropped)
+
+    def prewarm(self, warmup_frames=3):
+        self.prewarm_thread = threading.Thread(target=self._prewarm, args=(warmup_frames,),
+                                               name="session-prewarm", daemon=True)
+        self.prewarm_thread.start()
+
+    def _prewarm(self, warmup_frames):
+        started = time.perf_counter()
+        self._open()
+        opened = time.perf_counter()
+        if self.pipeline:
+            # The inference process warms its own model, wait for its first result
+            try:
+                ret, slot, _, _ = self.pipeline.read(timeout=30.0)
+                if ret:
+                    self.pipeline.release_frame(slot)
+            except queue.Empty:
+                logger.warning("Pipeline produced no frame while prewarming")
+            self.pipeline.pause()
+        else:
+            blank = np.zeros((480, 640, 3), dtype=np.uint8)
+            for _ in range(warmup_frames if self.hands else 0):
+                self.hands.process(blank)
+            if self.replay is None:
+                # Also wait for the camera to deliver, the first frame of many devices is slow
+                self.cap.read(timeout=5.0)
+            self.cap.pause()
+        logger.info("Engine ready %.0f ms after start (open %.0f ms, warm-up %.0f ms)",
+                    (time.perf_counter() - self.created) * 1000, (opened - started) * 1000,
+                    (time.perf_counter() - opened) * 1000)
+
+    def resume(self, mode):
+        """Start delivering frames for mode, opening everything on first use."""
+        if self.switch_started is None:
+            self.switch_started = time.perf_counter()
+        if self.prewarm_thread is not None:
+            self.prewarm_thread.join()
+            self.prewarm_thread = None
+        if mode == "capture" and self.capture_started is None:
+            self.capture_started = self.switch_started
+        self.mode = mode
+        if not self.opened:
+            self._open()
+        elif self.pipeline:
+            self.pipeline.resume()
+        else:
+            if self.roi_tracker:
+                self.roi_tracker.reset()
+            self.cap.resume()
+
+    def pause(self):
+        self.switch_started = time.perf_counter()
+        if self.pipeline:
+            self.pipeline.pause()
+        elif self.cap:
+            self.cap.pause()
+
+    def frame_arrived(self):
+        """Called for every frame read; the first one after a resume completes the switch."""
+        if self.switch_started is None:
+            return
+        elapsed = time.perf_counter() - self.switch_started
+        self.switch_started = None
+        self.switch_times.append((self.mode, elapsed))
+        logger.info("Switched to %s in %.0f ms", self.mode, elapsed * 1000)
+
+    def frame_processed(self):
+        """Called once a capture frame went through recognition; the first one is reported."""
+        if self.first_processed is not None:
+            return
+        self.first_processed = time.perf_counter()
+        logger.info("First frame recognized %.0f ms after start, %.0f ms after capture started",
+                    (self.first_processed - self.created) * 1000,
+                    (self.first_processed - self.capture_started) * 1000)
+
+    def supports_key(self, key):
+        """Whether the configured key backend can send key; checked when actions are compiled."""
+        return BACKENDS[self.key_backend].supports(key)
+
+    def send_action(self, mapping):
+        if self.pipeline:
+            self.pipeline.send_action(mapping)
+        else:
+            self.dispatcher.submit(mapping)
+
+    def read_hands(self, timeout=1.0):
+        """Return (ret, frame, hand_features) with a mirrored BGR frame the caller may draw on."""
+        if self.pipeline:
+            try:
+                ret, slot, view, landmarks = self.pipeline.read(timeout=timeout)
+            except queue.Empty:
+                return False, None, []
+            if not ret:
+                return False, None, []
+            frame = view.copy()
+            self.pipeline.release_frame(slot)
+            self.frame_arrived()
+            return True, frame, (HandFeatures.batch(landmarks, handedness=self.pipeline.handedness)
+                                 if landmarks is not None else [])
+        import cv2
+
+        ret, frame = self.cap.read(timeout)
+        if not ret:
+            return False, None, []
+        self.frame_arrived()
+        if not self.cap.needs_inference:
+            landmarks = self.cap.landmarks
+            return True, frame, ([HandFeatures(landmarks, handedness=self.cap.handedness)]
+                                 if landmarks is not None else [])
+        frame = cv2.flip(frame, 1)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = self.hands.process(rgb_frame)
+        return True, frame, hands_from_results(results.multi_hand_landmarks, results.multi_handedness)
+
+    def summary(self):
+        if not self.switch_times:
+            return "Mode switches: 0"
+        times = sorted(elapsed * 1000 for _, elapsed in self.switch_times)
+        return (f"Mode switches: {len(times)}, median {times[len(times) // 2]:.0f} ms, "
+                f"max {times[-1]:.0f} ms")
+
+    def close(self):
+        if self.prewarm_thread is not None:
+            self.prewarm_thread.join()
+        if self.pipeline:
+            self.pipeline.close()
+            print(f"Frames dropped: {self.pipeline.frames_dropped}")
+        elif self.cap:
+            self.cap.release()
+            self.dispatcher.close()
+            print(self.cap.summary())
+            print(self.dispatcher.latency_summary())
+            if self.roi_tracker:
+                print(self.roi_tracker.summary())
+            if self.hands:
+                self.hands.close()
+        print(self.summary())
+        self.pipeline = self.cap = self.hands = self.dispatcher = None
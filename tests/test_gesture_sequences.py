@@ -0,0 +1,111 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from action_table import check_gesture_name, parse_gesture_id
+from gesture_sequences import SequenceMatcher, compile_sequences
+
+
+def matcher(*keys, timeout=0.8):
+    return SequenceMatcher(compile_sequences({key: {'type': 'single', 'keys': ['a'], 'timeout': timeout}
+                                              for key in keys}))
+
+
+def hold(seq, gestures, start=0.0, step=0.1, hand="Right"):
+    """Hold each gesture for one update, a step apart, and return what completed."""
+    completed = []
+    for i, gesture in enumerate(gestures):
+        sequence = seq.update(hand, gesture, start + i * step)
+        if sequence:
+            completed.append(sequence)
+    return completed
+
+
+def test_sequence_completes_on_its_last_step():
+    seq = matcher("a, b, c")
+    assert hold(seq, ["a", "b", "c"]) == ["sequence:a, b, c"]
+
+
+def test_holding_a_gesture_is_one_step():
+    seq = matcher("a, b")
+    assert hold(seq, ["a", "a", "a", "b"]) == ["sequence:a, b"]
+
+
+def test_releasing_and_repeating_a_gesture_is_a_new_step():
+    seq = matcher("a, a")
+    assert hold(seq, ["a", None, "a"]) == ["sequence:a, a"]
+
+
+def test_prefix_completes_when_its_timeout_passes():
+    seq = matcher("a, b", "a, b, c")
+    assert hold(seq, ["a", "b"]) == []
+    assert seq.update("Right", "b", 0.5) is None
+    assert seq.update("Right", "b", 1.0) == "sequence:a, b"
+    # Back at the root, so c alone completes nothing
+    assert seq.update("Right", "c", 1.1) is None
+
+
+def test_prefix_completes_on_a_step_that_does_not_continue_it():
+    seq = matcher("a, b", "a, b, c")
+    assert hold(seq, ["a", "b", "d"]) == ["sequence:a, b"]
+
+
+def test_longer_sequence_wins_over_its_prefix():
+    seq = matcher("a, b", "a, b, c")
+    assert hold(seq, ["a", "b", "c"]) == ["sequence:a, b, c"]
+
+
+def test_too_slow_a_step_starts_over():
+    seq = matcher("a, b", timeout=0.5)
+    assert hold(seq, ["a", "b"], step=0.6) == []
+    assert hold(seq, ["a", "b"], start=2.0) == ["sequence:a, b"]
+
+
+def test_step_that_does_not_continue_restarts_from_the_root():
+    seq = matcher("a, b", "c, a")
+    # c breaks off a and starts c, a
+    assert hold(seq, ["a", "c", "a"]) == ["sequence:c, a"]
+
+
+def test_motion_is_a_step():
+    seq = matcher("finger:0, motion:swipe", "motion:swipe, motion:swipe")
+    assert seq.update("Right", "finger:0", 0.0) is None
+    assert seq.advance("Right", "motion:swipe", 0.4) == "sequence:finger:0, motion:swipe"
+    assert seq.advance("Right", "motion:swipe", 1.0) is None
+    assert seq.advance("Right", "motion:swipe", 1.5) == "sequence:motion:swipe, motion:swipe"
+
+
+def test_hands_are_followed_separately():
+    seq = matcher("a, b")
+    assert seq.update("Left", "a", 0.0) is None
+    assert seq.update("Right", "b", 0.1) is None
+    assert seq.update("Left", "b", 0.2) == "sequence:a, b"
+
+
+def test_single_step_sequences_are_ignored():
+    assert len(compile_sequences({"a": {}})) == 0
+
+
+@pytest.mark.parametrize("name", ["fist, palm", "a + b", "a,b"])
+def test_names_that_would_split_a_key_are_rejected(name):
+    with pytest.raises(ValueError):
+        check_gesture_name(name)
+    with pytest.raises(ValueError):
+        parse_gesture_id(name, {name: {'landmarks': []}}, {})
+
+
+def test_other_names_are_accepted():
+    check_gesture_name("thumbs up+")
+    assert parse_gesture_id("ok", {"ok": {'landmarks': []}}, {}) == "custom:ok"
+
+
+def test_finger_counts_stop_at_four():
+    assert parse_gesture_id("4", {}, {}) == "fingers:4"
+    with pytest.raises(ValueError, match="11111"):
+        parse_gesture_id("5", {}, {})
+
+
+def test_five_digits_are_a_pattern_not_a_count():
+    assert parse_gesture_id("00001", {}, {"00001": {}}) == "pattern:00001"
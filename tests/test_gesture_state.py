@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from action_table import compile_cooldowns
+from gesture_state import GestureStates, HandGestureState
+
+
+def feed(states, frames, start=0.0, step=0.1, hand="Right"):
+    """Feed one hand's classifications a frame apart and return everything that fired."""
+    fired = []
+    for i, gesture in enumerate(frames):
+        observations = [(hand, gesture)] if gesture is not None else []
+        fired += states.update(observations, start + i * step)
+    return fired
+
+
+def test_fires_once_a_majority_is_reached():
+    states = GestureStates(window=5)
+    assert feed(states, ["a", "a"]) == []
+    assert states.update([("Right", "a")], 0.2) == [("Right", "a")]
+    assert states.stable("Right") == "a"
+
+
+def test_single_flickering_frame_neither_fires_nor_releases():
+    states = GestureStates(window=5)
+    fired = feed(states, ["a", "a", "a", "b", "a", "a", None, "a"])
+    assert fired == [("Right", "a")]
+    assert states.stable("Right") == "a"
+
+
+def test_holding_a_gesture_fires_once():
+    states = GestureStates(window=5, default_cooldown=0.0)
+    assert feed(states, ["a"] * 20) == [("Right", "a")]
+
+
+def test_hand_out_of_view_releases_its_gesture():
+    states = GestureStates(window=5)
+    feed(states, ["a"] * 5)
+    fired = feed(states, [None] * 4, start=0.5)
+    assert fired == []
+    assert states.stable("Right") is None
+
+
+def test_released_gesture_fires_again_after_its_cooldown():
+    states = GestureStates(window=5, default_cooldown=0.5)
+    fired = feed(states, ["a"] * 5 + ["b"] * 5 + ["a"] * 5, step=0.2)
+    assert fired == [("Right", "a"), ("Right", "b"), ("Right", "a")]
+
+
+def test_cooldown_suppresses_a_quick_repeat():
+    class Metrics:
+        def __init__(self):
+            self.counts = {}
+
+        def count(self, name):
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    metrics = Metrics()
+    states = GestureStates(window=5, default_cooldown=2.0, metrics=metrics)
+    fired = feed(states, ["a"] * 5 + ["b"] * 5 + ["a"] * 5, step=0.1)
+    assert fired == [("Right", "a"), ("Right", "b")]
+    assert metrics.counts == {"cooldown_suppressed": 1}
+    # Held through its cooldown it does not fire late; it has to be made again
+    assert feed(states, ["a"] * 30, start=1.5) == []
+    assert feed(states, ["b"] * 5 + ["a"] * 5, start=5.0) == [("Right", "b"), ("Right", "a")]
+
+
+def test_mapping_cooldown_overrides_the_default():
+    states = GestureStates(window=3, default_cooldown=10.0, cooldowns={"a": 0.1})
+    fired = feed(states, ["a"] * 3 + ["b"] * 3 + ["a"] * 3, step=0.1)
+    assert fired == [("Right", "a"), ("Right", "b"), ("Right", "a")]
+
+
+def test_hands_are_voted_on_separately():
+    states = GestureStates(window=3)
+    fired = []
+    for i in range(2):
+        fired += states.update([("Left", "a"), ("Right", "b")], i * 0.1)
+    assert sorted(fired) == [("Left", "a"), ("Right", "b")]
+
+
+def test_window_of_one_fires_on_every_change():
+    states = GestureStates(window=1, default_cooldown=0.0)
+    assert feed(states, ["a", "b", "a"]) == [("Right", "a"), ("Right", "b"), ("Right", "a")]
+
+
+def test_invalid_votes_are_rejected():
+    with pytest.raises(ValueError):
+        HandGestureState(window=3, enter_votes=4)
+    with pytest.raises(ValueError):
+        HandGestureState(window=3, enter_votes=2, exit_votes=0)
+
+
+def test_combo_and_sequence_cooldowns_are_compiled():
+    cooldowns = compile_cooldowns({1: {'keys': ['a'], 'cooldown': 1}}, {}, {},
+                                  combos={"fingers:1 + fingers:2": {'keys': ['b'], 'cooldown': 2}},
+                                  sequences={"fingers:0, fingers:4": {'keys': ['c'], 'cooldown': 3},
+                                             "fingers:1, fingers:4": {'keys': ['d']}})
+    assert dict(cooldowns) == {"fingers:1": 1.0, "combo:fingers:1 + fingers:2": 2.0,
+                               "sequence:fingers:0, fingers:4": 3.0}
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gesture_templates import (INDEX_MIN_TEMPLATES, MATCH_THRESHOLD, TemplateIndex, TemplateMatrix,
+                               compile_templates)
+from landmarks import normalize_landmark_array
+
+
+def random_library(rng, gestures, per_gesture=4):
+    basis = rng.normal(0, 0.15, (8, 63))
+    library = {}
+    for g in range(gestures):
+        base = (rng.normal(0, 1, 8) @ basis).reshape(21, 3)
+        poses = [normalize_landmark_array(base + rng.normal(0, 0.02, (21, 3))).tolist() for _ in range(per_gesture)]
+        library[f"g{g}"] = {'type': 'single', 'keys': ['a'], 'landmarks': poses[0], 'extra_templates': poses[1:]}
+    return library
+
+
+def queries(rng, library, count, noise):
+    names = sorted(library)
+    hands = []
+    for _ in range(count):
+        pose = np.array(library[names[rng.integers(len(names))]]['landmarks'], dtype=np.float32)
+        hands.append(normalize_landmark_array(pose + rng.normal(0, noise, (21, 3))))
+    return hands
+
+
+def brute_force(matrix, hand, k, threshold=MATCH_THRESHOLD):
+    """Up to k (name, distance) of distinct gestures under threshold, from every template distance."""
+    distances = matrix.distances(hand)
+    best = {}
+    for label, dist in zip(matrix.label_ids.tolist(), distances.tolist()):
+        if dist < threshold and dist < best.get(label, threshold):
+            best[label] = dist
+    return [(matrix.names[label], dist) for label, dist in sorted(best.items(), key=lambda item: item[1])[:k]]
+
+
+@pytest.mark.parametrize("noise", [0.01, 0.05, 0.3])
+@pytest.mark.parametrize("k", [1, 3])
+def test_index_query_matches_brute_force(noise, k):
+    rng = np.random.default_rng(1)
+    library = random_library(rng, 150)
+    matrix = TemplateMatrix(library)
+    index = TemplateIndex(library)
+    for hand in queries(rng, library, 40, noise):
+        expected = brute_force(matrix, hand, k)
+        found = index.query(hand, k=k)
+        assert [name for name, _ in found] == [name for name, _ in expected]
+        assert [dist for _, dist in found] == pytest.approx([dist for _, dist in expected], abs=1e-5)
+
+
+def test_index_match_agrees_with_the_matrix():
+    rng = np.random.default_rng(2)
+    library = random_library(rng, 120)
+    matrix = TemplateMatrix(library)
+    index = TemplateIndex(library)
+    for hand in queries(rng, library, 40, 0.02):
+        name, dist, _ = matrix.match(hand)
+        assert dist < MATCH_THRESHOLD
+        assert index.match(hand)[:2] == (name, pytest.approx(dist, abs=1e-5))
+
+
+def test_index_match_is_empty_beyond_the_threshold():
+    rng = np.random.default_rng(3)
+    index = TemplateIndex(random_library(rng, 50))
+    far = np.full((21, 3), 5.0, dtype=np.float32)
+    assert index.match(far) == (None, float('inf'), float('inf'))
+
+
+def test_empty_library():
+    assert TemplateIndex({}).query(np.zeros((21, 3), dtype=np.float32)) == []
+    assert TemplateMatrix({}).match(np.zeros((21, 3), dtype=np.float32))[0] is None
+
+
+def test_large_libraries_are_indexed():
+    rng = np.random.default_rng(4)
+    assert isinstance(compile_templates(random_library(rng, INDEX_MIN_TEMPLATES // 4)), TemplateIndex)
+    assert type(compile_templates(random_library(rng, 10))) is TemplateMatrix
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from landmark_recorder import META_FILE, LandmarkRecorder, open_recording
+
+
+def hand(i):
+    return np.full((21, 3), i, dtype=np.float32)
+
+
+def record(recorder, frames, start=0):
+    for i in range(start, start + frames):
+        recorder.append(0.1 + i / 30.0, hand(i) if i % 3 else None, "Right" if i % 2 else "Left",
+                        "fingers:1" if i % 5 == 0 else None)
+
+
+def meta_frames(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)["frames"]
+
+
+def test_recording_grows_past_its_chunks(tmp_path):
+    recorder = LandmarkRecorder(str(tmp_path), chunk_frames=16)
+    record(recorder, 50)
+    recorder.close()
+    columns, gestures = open_recording(str(tmp_path))
+    assert len(columns["timestamps"]) == 50
+    assert columns["present"].tolist() == [bool(i % 3) for i in range(50)]
+    assert np.array_equal(columns["landmarks"][49], hand(49))
+    assert columns["handedness"][:2].tolist() == [0, 1]
+    assert gestures == ["fingers:1"]
+    assert columns["gesture"][:6].tolist() == [0, -1, -1, -1, -1, 0]
+
+
+def test_unclosed_recording_recovers_frames_after_its_meta(tmp_path):
+    recorder = LandmarkRecorder(str(tmp_path), chunk_frames=64, meta_interval=3600.0)
+    record(recorder, 100)
+    # meta.json was last written when the files grew past 64 rows
+    assert meta_frames(str(tmp_path)) < 100
+    columns, _ = open_recording(str(tmp_path))
+    assert len(columns["timestamps"]) == 100
+    assert columns["timestamps"][-1] == 0.1 + 99 / 30.0
+
+
+def test_crashed_process_leaves_a_readable_recording(tmp_path):
+    script = (
+        "import os, sys\n"
+        f"sys.path.insert(0, {ROOT!r})\n"
+        f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+        "from landmark_recorder import LandmarkRecorder\n"
+        "from test_landmark_recorder import record\n"
+        f"recorder = LandmarkRecorder({str(tmp_path)!r}, chunk_frames=32)\n"
+        "record(recorder, 75)\n"
+        "os._exit(1)\n"
+    )
+    assert subprocess.run([sys.executable, "-c", script]).returncode == 1
+    columns, gestures = open_recording(str(tmp_path))
+    assert len(columns["timestamps"]) == 75
+    assert gestures == ["fingers:1"]
+    assert np.array_equal(columns["landmarks"][74], hand(74))
+
+
+def test_new_recording_replaces_the_old_one(tmp_path):
+    recorder = LandmarkRecorder(str(tmp_path), chunk_frames=16)
+    record(recorder, 40)
+    recorder.close()
+    recorder = LandmarkRecorder(str(tmp_path), chunk_frames=16, meta_interval=3600.0)
+    record(recorder, 5)
+    # Not closed: leftover rows of the first recording must not be recovered
+    columns, _ = open_recording(str(tmp_path))
+    assert len(columns["timestamps"]) == 5
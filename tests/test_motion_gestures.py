@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from motion_gestures import (MOTION_BAND, MOTION_FRAMES, MOTION_SECONDS, MOTION_THRESHOLD, MotionTemplates,
+                             MotionTracker, banded_dtw, resample_trajectory, trajectory_from_hands)
+
+
+def reference_dtw(template, query, band):
+    """Textbook DTW over the cells within band of the diagonal, divided by the length."""
+    length = len(template)
+    table = np.full((length + 1, length + 1), np.inf)
+    table[0, 0] = 0.0
+    for i in range(1, length + 1):
+        for j in range(max(1, i - band), min(length, i + band) + 1):
+            diffs = (template[i - 1] - query[j - 1]).reshape(-1, 2)
+            cost = np.sqrt((diffs ** 2).sum(axis=1)).mean()
+            table[i, j] = cost + min(table[i - 1, j], table[i, j - 1], table[i - 1, j - 1])
+    return table[length, length] / length
+
+
+def swipe_hands(fraction, direction=1.0):
+    """A hand whose wrist and fingertips have moved fraction of the way across a sideways swipe."""
+    raw = np.zeros((21, 3), dtype=np.float32)
+    raw[:, 0] = 0.3 + direction * 0.4 * fraction
+    raw[:, 1] = 0.6
+    raw[1:, 1] -= np.linspace(0.02, 0.2, 20)
+    # Wrist to middle-finger base, the hand size the trajectory is measured in
+    raw[9] = raw[0] + (0.0, -0.1, 0.0)
+    return raw
+
+
+def swipe(frames, direction=1.0, ease=1.0):
+    return [swipe_hands((i / (frames - 1)) ** ease, direction) for i in range(frames)]
+
+
+@pytest.mark.parametrize("band", [0, 2, MOTION_BAND])
+def test_banded_dtw_matches_the_reference(band):
+    rng = np.random.default_rng(0)
+    templates = rng.normal(0, 1, (3, 12, 12)).astype(np.float32)
+    query = rng.normal(0, 1, (12, 12)).astype(np.float32)
+    expected = [reference_dtw(template, query, band) for template in templates]
+    assert banded_dtw(templates, query, band).tolist() == pytest.approx(expected, rel=1e-5)
+
+
+def test_identical_trajectory_has_zero_distance():
+    trajectory = trajectory_from_hands(swipe(MOTION_FRAMES))
+    assert banded_dtw(trajectory[None], trajectory)[0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_slower_start_still_matches_and_other_motions_do_not():
+    motions = MotionTemplates({"right": {'trajectory': trajectory_from_hands(swipe(MOTION_FRAMES)).tolist()}})
+    eased = trajectory_from_hands(swipe(MOTION_FRAMES, ease=1.5))
+    name, distance = motions.match(eased)
+    assert name == "right" and distance < MOTION_THRESHOLD
+    left = trajectory_from_hands(swipe(MOTION_FRAMES, direction=-1.0))
+    assert motions.match(left)[0] is None
+    assert motions.match(left)[1] >= MOTION_THRESHOLD
+
+
+def test_empty_library_matches_nothing():
+    assert MotionTemplates({}).match(np.zeros((MOTION_FRAMES, 12), dtype=np.float32)) == (None, float('inf'))
+
+
+def test_resample_keeps_the_end_points():
+    trajectory = np.arange(10, dtype=np.float32)[:, None].repeat(12, axis=1)
+    resampled = resample_trajectory(trajectory, 4)
+    assert resampled[:, 0].tolist() == pytest.approx([0.0, 3.0, 6.0, 9.0])
+
+
+@pytest.mark.parametrize("fps", [15, 30, 60])
+def test_tracker_matches_the_same_motion_at_any_frame_rate(fps):
+    motions = MotionTemplates({"right": {'trajectory': trajectory_from_hands(swipe(MOTION_FRAMES)).tolist()}})
+    tracker = MotionTracker()
+    frames = int(round(MOTION_SECONDS * fps)) + 1
+    # Still for a while, then the swipe over MOTION_SECONDS, then still again
+    hands = [swipe_hands(0.0)] * fps + swipe(frames) + [swipe_hands(1.0)] * fps
+    fired = [i for i, raw in enumerate(hands) if tracker.update(raw, motions, i / fps)]
+    assert len(fired) == 1
+
+
+def test_tracker_waits_for_a_full_window():
+    motions = MotionTemplates({"right": {'trajectory': trajectory_from_hands(swipe(MOTION_FRAMES)).tolist()}})
+    tracker = MotionTracker()
+    # The whole swipe in half the window's time never covers MOTION_SECONDS of history before it ends
+    hands = swipe(MOTION_FRAMES // 2)
+    assert not any(tracker.update(raw, motions, i / 30.0) for i, raw in enumerate(hands))
+    assert tracker.window(len(hands) / 30.0) is None